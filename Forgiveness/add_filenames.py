@@ -1,17 +1,120 @@
+import argparse
+import os
+
 import pandas as pd
-import numpy as np
-import json
+
+import jsonl
+from metrics import Metrics
+
+CODE = "Parole Applicant Code"
+DATE = "Interview/Decision Date"
+BIRTH_YEAR = "Birth Year"
+
+# Headings on a record page, in page order. The parser only returns the
+# headings a page actually has, so every chunk is reindexed to this list:
+# data.json lines then all carry the same keys (null where a page had no
+# such heading), and normalize() never meets a missing column.
+COLUMNS = [
+    "Issuing Body",
+    CODE,
+    "Sex",
+    BIRTH_YEAR,
+    "Race/Ethnicity",
+    "Controlling Conviction",
+    "Aggregate Minimum Sentence",
+    "Aggregate Maximum Sentence",
+    "Facility",
+    DATE,
+    "Interview Type",
+    "Form of Interview",
+    "Decision",
+    "Grounds for Denial",
+    "Hold Time/Duration",
+    "Document Type",
+    "Collection",
+    "Recommended Citation",
+    "Commissioners' Location",
+    "Dissenting Commissioner",
+    "Dissenting Vote",
+    "Comments",
+]
+
 
 def make_filename(code: str, date: str):
     return f"{code}-{date}.txt"
 
 
-df = pd.read_json("data1.json")
-df = df.T
+def normalize(df):
+    # Column-wise only: no per-row Python, so this stays cheap as the
+    # collection grows.
+    df = df.reindex(columns=list(dict.fromkeys([*df.columns, CODE, DATE, BIRTH_YEAR])))
+    df = df.dropna(subset=[CODE]).copy()
+
+    df["Filename"] = df[CODE].astype("string") + "-" + df[DATE].astype("string") + ".txt"
+    df[DATE] = pd.to_datetime(df[DATE], format="%Y-%m-%d", errors="coerce")
+    df[BIRTH_YEAR] = pd.to_numeric(df[BIRTH_YEAR], errors="coerce").round().astype("Int16")
+
+    return df
+
+
+def for_json(df):
+    out = df.copy()
+    out[DATE] = out[DATE].dt.strftime("%Y-%m-%d")
+    return out
+
+
+def scraped_frames(path, size=jsonl.CHUNK_SIZE):
+    # Scraper output in id order, a chunk at a time. The scraper appends,
+    # so a page fetched twice (--resume, --retry-failed) keeps its last copy.
+    if not jsonl.is_json_lines(path):
+        # Older scraper output: a single {id: record} object.
+        yield pd.read_json(path, dtype=False).T.reindex(columns=COLUMNS)
+        return
+    offsets = jsonl.last_offsets(path, "id")
+    ordered = (offsets[i] for i in sorted(offsets))
+    records = (entry["record"] for entry in jsonl.read_at(path, ordered))
+    yield from jsonl.iter_frames(records, size, COLUMNS)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Normalize scraped records and add filenames")
+    parser.add_argument("--data", default="data1.json", help="scraper output (one line per record id)")
+    parser.add_argument("--out", default="data.json")
+    parser.add_argument("--chunk-size", type=int, default=jsonl.CHUNK_SIZE)
+    parser.add_argument("--metrics", default=None, metavar="PATH",
+                        help="write per-stage timings as JSON (and OpenMetrics text "
+                             "alongside as .prom)")
+    args = parser.parse_args()
+
+    metrics = Metrics("add_filenames")
+
+    load = metrics.get("load")
+    load.bytes_in = os.path.getsize(args.data)
+    frames = scraped_frames(args.data, args.chunk_size)
+
+    # Written beside and renamed, so a crash never leaves a half data.json.
+    tmp = args.out + ".tmp"
+    with jsonl.RecordWriter(tmp) as writer:
+        while True:
+            with metrics.stage("load"):
+                df = next(frames, None)
+            if df is None:
+                break
+            load.items += len(df)
+
+            with metrics.stage("normalize") as stage:
+                df = normalize(df)
+                stage.items += len(df)
+
+            with metrics.stage("write") as write:
+                writer.write_frame(for_json(df))
+    os.replace(tmp, args.out)
+    metrics.get("write").bytes_out = os.path.getsize(args.out)
+    print(f"{writer.count} records written to {args.out}")
 
-#print(df['Parole Applicant Code'])
-#print(df['Interview/Decision Date'])
+    if args.metrics:
+        metrics.write(args.metrics)
 
-df["Filename"] = df.apply(lambda row: make_filename(row["Parole Applicant Code"], row["Interview/Decision Date"]), axis=1)
 
-df.to_json("data.json", orient="records", lines=True)
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,13 @@
 from manim import *
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from cube import scene_stats
+
+STATS = scene_stats(os.environ.get("PAROLE_CUBE"))
+ACTUAL_PCT = round(STATS["actual_rate"] * 100)
 
 class ParoleBoardFailure(Scene):
     def construct(self):
@@ -15,11 +24,11 @@ class ParoleBoardFailure(Scene):
         self.play(FadeOut(subtitle))
 
         # Data Slide 1: Actual vs Potential Parole Release Rate
-        actual = BarChart([20], y_range=[0, 100, 10], bar_names=["Actual"], bar_width=0.5).scale(0.2)
+        actual = BarChart([ACTUAL_PCT], y_range=[0, 100, 10], bar_names=["Actual"], bar_width=0.5).scale(0.2)
         potential = BarChart([49], y_range=[0, 100, 10], bar_names=["Potential"], bar_width=0.5).scale(0.2)
         actual_bar = actual.bars[0]
         potential_bar = potential.bars[0]
-        actual_label = Text("Actual: 20%", font_size=24).next_to(actual_bar, UP).scale(0.2)
+        actual_label = Text(f"Actual: {ACTUAL_PCT}%", font_size=24).next_to(actual_bar, UP).scale(0.2)
         potential_label = Text("With Algorithm: 49%", font_size=24).next_to(potential_bar, UP).scale(0.2)
 
         group = VGroup(actual, potential).arrange(RIGHT, buff=2)
@@ -1,5 +1,27 @@
 from manim import *
 import numpy as np
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from cube import scene_stats
+
+# Set PAROLE_CUBE=path/to/cube.json to draw the numbers from the scraped
+# dataset instead of the cited study figures, and
+# PAROLE_APPLICANTS=path/to/applicants.parquet for the wait between hearings
+# and PAROLE_RECORDS=path/to/data.json for the days held after denials.
+STATS = scene_stats(os.environ.get("PAROLE_CUBE"), os.environ.get("PAROLE_APPLICANTS"),
+                    os.environ.get("PAROLE_RECORDS"))
+WAIT_DAYS = round(STATS["wait_days"])
+WAIT_YEARS = max(1, round(STATS["wait_days"] / 365))
+DENIED_DAYS = round(STATS["denied_days"])
+# Rounded down for "Over N YEARS": 4,007,700 days -> 10,000.
+DENIED_YEARS = DENIED_DAYS // 365
+DENIED_YEARS -= DENIED_YEARS % (1000 if DENIED_YEARS >= 1000 else 100 if DENIED_YEARS >= 100 else 1)
+# Each dot in the denied-days scene is one "square" from the wait scene,
+# matching its "Each square is ~N years" note: 4,007,700 / 730 -> 5,490.
+DENIED_DOTS = round(DENIED_DAYS / WAIT_DAYS)
 
 # Define colors
 ACCENT_COLOR = "#00d4ff"
@@ -55,15 +77,22 @@ class ParoleVisualization(Scene):
         self.citation(t1, t2)
 
     def hook_sequence(self):
+        # The race rates that follow come from the cube when one is set, so
+        # only credit NYU for the study figures.
+        if "cube" in STATS["sources"]:
+            source = "In the hearings we collected"
+        else:
+            source = "According to NYU\nBased on figures from 2023"
         hook_text = Text(
-            "According to NYU\nBased on figures from 2023\nRace plays a large role in parole decisions",
+            f"{source}\nRace plays a large role in parole decisions",
             font_size=48,
             color=TEXT_COLOR,
             line_spacing=1.2
         ).scale(0.2)
         
         # Emphasize "HALF"
-        hook_text[21:25].set_color(WARNING_COLOR)  # "HALF"
+        if "cube" not in STATS["sources"]:
+            hook_text[21:25].set_color(WARNING_COLOR)  # "HALF"
         
         self.play(FadeIn(hook_text), run_time=2.5)
         self.wait(3)
@@ -86,16 +115,18 @@ class ParoleVisualization(Scene):
 
         
         # Data for bars
-        white_bar = Rectangle(height=45*4/30, width=1.5, color=WHITE, fill_opacity=0.8).scale(0.2)
-        black_bar = Rectangle(height=32*4/30, width=1.5, color="#ff6b35", fill_opacity=0.8).scale(0.2)
+        white_pct = round(STATS["white_rate"] * 100)
+        poc_pct = round(STATS["poc_rate"] * 100)
+        white_bar = Rectangle(height=white_pct*4/30, width=1.5, color=WHITE, fill_opacity=0.8).scale(0.2)
+        black_bar = Rectangle(height=poc_pct*4/30, width=1.5, color="#ff6b35", fill_opacity=0.8).scale(0.2)
         
         # Position bars
-        white_bar.move_to(axes.c2p(1, 14.5))
-        black_bar.move_to(axes.c2p(2, 8.35))
+        white_bar.move_to(axes.c2p(1, 14.5 * white_pct / 45))
+        black_bar.move_to(axes.c2p(2, 8.35 * poc_pct / 32))
         
         # Labels
-        white_label = Text("White People\n45%", font_size=24, color=WHITE).scale(0.2)
-        black_label = Text("People of Color\n32%", font_size=24, color="#ff6b35").scale(0.2)
+        white_label = Text(f"White People\n{white_pct}%", font_size=24, color=WHITE).scale(0.2)
+        black_label = Text(f"People of Color\n{poc_pct}%", font_size=24, color="#ff6b35").scale(0.2)
         
         white_label.next_to(white_bar, DOWN*0.3, buff=0.6)
         black_label.next_to(black_bar, DOWN*0.3, buff=0.6)
@@ -122,7 +153,9 @@ class ParoleVisualization(Scene):
         title.shift(UP*0.6)
         
         # Create dots representing hearings
-        total_text = Text("Out of 19,713 Parole Hearings in NYS", font_size=36, color=TEXT_COLOR).scale(0.2)
+        # A cube counts the transcripts we collected, not every hearing in the state
+        scope = "in Our Sample" if "cube" in STATS["sources"] else "in NYS"
+        total_text = Text(f"Out of {STATS['hearings']:,} Parole Hearings {scope}", font_size=36, color=TEXT_COLOR).scale(0.2)
         total_text.next_to(title, DOWN*1.5, buff=1)
         
         # Create grid of dots
@@ -136,14 +169,14 @@ class ParoleVisualization(Scene):
         dots.move_to(ORIGIN)
         
         # Highlight released dots (about 20%)
-        released_dots = dots[:80]  # Roughly 20% of 400 dots
+        released_dots = dots[:round(400 * STATS["actual_rate"])]  # Roughly 20% of 400 dots
         
         self.play(FadeIn(title))
         self.play(FadeIn(total_text))
         self.play(Create(dots), run_time=4)
         self.wait(3)
         
-        released_text = Text("Only 4,168 Were Released (21%)", font_size=32, color=WARNING_COLOR).scale(0.2)
+        released_text = Text(f"Only {STATS['released']:,} Were Released ({STATS['release_rate']:.0%})", font_size=32, color=WARNING_COLOR).scale(0.2)
         released_text.shift(DOWN*0.6)
         
         self.play(
@@ -154,7 +187,13 @@ class ParoleVisualization(Scene):
         self.wait(3)
         self.play(FadeOut(released_text))
 
-        possible_dots = dots[80:196]  # Roughly 20% of 400 dots
+        # The "another 5491" figure is the study's estimate for all NYS
+        # hearings; it says nothing about a sample's counts.
+        if "cube" in STATS["sources"]:
+            self.play(FadeOut(title, total_text, dots))
+            return
+
+        possible_dots = dots[len(released_dots):196]
 
         possible_text = Text("We could have released another 5491 without increasing crime", font_size=32, color=WARNING_COLOR).scale(0.2)
         possible_text.shift(DOWN*0.6)
@@ -188,22 +227,22 @@ class ParoleVisualization(Scene):
         self.wait(3)
 
         # Show 2 years worth of days
-        wait_text = Text("The average wait for another parole hearing is 2 years", font_size=32, color=WARNING_COLOR).scale(0.2)
+        wait_text = Text(f"The average wait for another parole hearing is {WAIT_YEARS} year{'s' if WAIT_YEARS != 1 else ''}", font_size=32, color=WARNING_COLOR).scale(0.2)
         wait_text.shift(DOWN*0.4)
         
         self.play(FadeIn(wait_text))
         self.wait(4)
         
-        # Create grid representing 730 days (2 years)
+        # Create grid representing WAIT_DAYS days (730 = 2 years)
         days_grid = VGroup()
-        for i in range(26):  # 26 rows
-            for j in range(28):  # 28 columns = 728, close to 730
-                if len(days_grid) < 730:
+        for i in range(-(-WAIT_DAYS // 28)):  # 26 rows for 730 days
+            for j in range(28):  # 28 columns
+                if len(days_grid) < WAIT_DAYS:
                     day_square = Square(side_length=0.04, color=WARNING_COLOR, fill_opacity=0.6).scale(0.2)
                     day_square.move_to([j*0.06 - 0.8, -i*0.04 + 0.5, 0])
                     days_grid.add(day_square)
         
-        days_count = Text("730 Days", font_size=24, color=WARNING_COLOR).scale(0.2)
+        days_count = Text(f"{WAIT_DAYS:,} Days", font_size=24, color=WARNING_COLOR).scale(0.2)
         days_count.next_to(days_grid, DOWN, buff=0.08)
 
         self.play(FadeOut(day_label, wait_text))
@@ -215,14 +254,20 @@ class ParoleVisualization(Scene):
         shrink_text.shift(DOWN*0.5)
         single_day = Square(side_length=0.04, color=RED, fill_opacity=0.6).scale(0.2)
         self.play(ReplacementTransform(days_grid, single_day), FadeIn(shrink_text), run_time=2)
-        scale_note = Text("Each square is ~2 years", font_size=20, color=TEXT_COLOR).scale(0.2)
+        scale_note = Text(f"Each square is ~{WAIT_YEARS} year{'s' if WAIT_YEARS != 1 else ''}", font_size=20, color=TEXT_COLOR).scale(0.2)
         scale_note.shift(DOWN*0.7)
 
         # Now show the massive scale
-        massive_text = Text("In a 2 year sample, 5,490 people were denied parole unnecessarily", font_size=32, color=TEXT_COLOR).scale(0.2)
+        if "records" in STATS["sources"]:
+            # Counted from the scraped records: every denial, not the study's
+            # estimate of the unnecessary ones
+            massive_text = Text(f"In our sample, {STATS['denied_hearings']:,} parole hearings ended in a denial", font_size=32, color=TEXT_COLOR).scale(0.2)
+            total_days = self.bg_text(f"That's {DENIED_DAYS:,} more days in prison\nOver {DENIED_YEARS:,} YEARS of human life")
+        else:
+            massive_text = Text(f"In a 2 year sample, {STATS['denied_hearings']:,} people were denied parole unnecessarily", font_size=32, color=TEXT_COLOR).scale(0.2)
+            total_days = self.bg_text(f"That's {DENIED_DAYS:,} unnecessary days in prison\nOver {DENIED_YEARS:,} YEARS of human life wasted")
         massive_text.shift(UP*0.4)
         
-        total_days = self.bg_text("That's 4,007,700 unnecessary days in prison\nOver 10,000 YEARS of human life wasted")
         total_days.shift(DOWN*0.2)
 
         self.wait(3)
@@ -233,11 +278,11 @@ class ParoleVisualization(Scene):
         self.wait(6)
         
         # Create visual representation of the massive number
-        # Use dots to represent chunks of days (each dot = 1000 days)
+        # Use dots to represent chunks of days (each dot = WAIT_DAYS days, one square)
         massive_dots = VGroup()
-        for i in range(50):
+        for i in range(-(-DENIED_DOTS // 100)):  # 55 rows for 5,490 dots
             for j in range(100):
-                if len(massive_dots) < 5008:  # Roughly 4,007,700 / 1000
+                if len(massive_dots) < DENIED_DOTS:
                     dot = Dot(radius=0.008, color=RED, fill_opacity=0.8)
                     dot.move_to([j*0.016 - 0.8, -i*0.016 + 0.3, 0])
                     massive_dots.add(dot)
@@ -0,0 +1,130 @@
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+import jsonl
+
+# Hearing history per Parole Applicant Code. The records are sorted once by
+# (code, date) and kept as columns; each applicant is a contiguous run of
+# rows, so a history lookup is a slice and the longitudinal measures below
+# are single vectorized passes instead of pairwise scans over data.json.
+#
+#   gaps()           days between each hearing and the applicant's previous one
+#   denial_chains()  runs of consecutive denials per applicant
+#   mean_wait()      average gap after a denial (the "wait for another hearing")
+
+CODE = "Parole Applicant Code"
+DATE = "Interview/Decision Date"
+DECISION = "Decision"
+HOLD = "Hold Time/Duration"
+TYPE = "Interview Type"
+FILENAME = "Filename"
+
+COLUMNS = [CODE, DATE, DECISION, HOLD, TYPE, FILENAME]
+
+DENIED = "Parole Denied"
+
+
+class HearingIndex:
+    def __init__(self, df):
+        df = df[COLUMNS].dropna(subset=[CODE]).copy()
+        df[DATE] = pd.to_datetime(df[DATE], errors="coerce")
+        self.df = df.sort_values([CODE, DATE], kind="stable").reset_index(drop=True)
+
+        codes = self.df[CODE].to_numpy()
+        # Row i starts a new applicant when its code differs from row i-1.
+        self.first = np.ones(len(codes), dtype=bool)
+        self.first[1:] = codes[1:] != codes[:-1]
+        starts = np.flatnonzero(self.first)
+        ends = np.append(starts[1:], len(codes))
+        self.offsets = dict(zip(codes[starts], zip(starts.tolist(), ends.tolist())))
+
+    @classmethod
+    def from_json(cls, path):
+        # The index sorts every hearing, so it holds all rows of COLUMNS;
+        # the other columns are dropped chunk by chunk as the file is read.
+        return cls(jsonl.read_frame(path, columns=COLUMNS))
+
+    @classmethod
+    def load(cls, path):
+        return cls(pd.read_parquet(path))
+
+    def save(self, path):
+        self.df.to_parquet(path, compression="zstd", index=False)
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def __contains__(self, code):
+        return code in self.offsets
+
+    def history(self, code):
+        start, end = self.offsets[code]
+        return self.df.iloc[start:end]
+
+    def hearing_counts(self):
+        return self.df.groupby(CODE, sort=False).size()
+
+    def gaps(self):
+        # NaN on each applicant's first hearing.
+        days = self.df[DATE].diff().dt.days.to_numpy(dtype=float, copy=True)
+        days[self.first] = np.nan
+        return pd.Series(days, index=self.df.index, name="gap_days")
+
+    def previous_decision(self):
+        return self.df[DECISION].shift().mask(self.first)
+
+    def mean_wait(self):
+        # Mean days from a denial to the applicant's next hearing.
+        gaps = self.gaps()
+        after_denial = gaps[(self.previous_decision() == DENIED) & gaps.notna()]
+        return float(after_denial.mean()) if len(after_denial) else None
+
+    def denial_chains(self, min_length=1):
+        # A chain is a maximal run of consecutive denials for one applicant;
+        # any other decision (or a new applicant) starts a new run.
+        denied = (self.df[DECISION] == DENIED).to_numpy()
+        breaks = self.first | ~denied
+        run = np.cumsum(breaks)
+        rows = self.df[denied].assign(_run=run[denied])
+        chains = rows.groupby("_run", sort=False).agg(
+            code=(CODE, "first"),
+            first=(DATE, "min"),
+            last=(DATE, "max"),
+            length=(DATE, "size"),
+        ).reset_index(drop=True)
+        return chains[chains["length"] >= min_length]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Index hearings by applicant")
+    parser.add_argument("--data", default="data.json")
+    parser.add_argument("--out", default="applicants.parquet")
+    parser.add_argument("--code", default=None, help="print one applicant's history")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    index = HearingIndex.from_json(args.data)
+    index.save(args.out)
+    elapsed = time.perf_counter() - t0
+
+    if args.code:
+        print(index.history(args.code).to_string(index=False))
+        return
+
+    counts = index.hearing_counts()
+    chains = index.denial_chains()
+    wait = index.mean_wait()
+    print(f"{len(index)} applicants, {len(index.df)} hearings, "
+          f"{int((counts > 1).sum())} with more than one hearing ({elapsed:.2f}s)")
+    if wait is not None:
+        print(f"mean wait after a denial: {wait:.0f} days ({wait / 365:.1f} years)")
+    if len(chains):
+        print(f"longest denial chain: {chains['length'].max()} hearings, "
+              f"{int((chains['length'] > 1).sum())} runs of two or more")
+
+
+if __name__ == "__main__":
+    main()
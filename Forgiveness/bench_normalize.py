@@ -0,0 +1,53 @@
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from add_filenames import CODE, DATE, make_filename, normalize
+
+# Compares the vectorized normalize() with the old row-wise
+# df.apply(make_filename, axis=1) on synthetic frames of growing size.
+
+
+def synthetic(n, seed=0):
+    rng = np.random.default_rng(seed)
+    codes = pd.Series(np.char.add("FUSL", np.char.zfill(rng.integers(0, 10**6, n).astype(str), 6)))
+    codes[rng.random(n) < 0.01] = None
+    days = rng.integers(0, 20 * 365, n)
+    dates = (pd.Timestamp("2000-01-01") + pd.to_timedelta(days, unit="D")).strftime("%Y-%m-%d")
+    return pd.DataFrame({
+        CODE: codes.astype(object),
+        DATE: np.asarray(dates, dtype=object),
+        "Birth Year": rng.integers(1940, 2000, n).astype(float),
+    })
+
+
+def timed(fn):
+    t0 = time.perf_counter()
+    fn()
+    return time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark record normalization")
+    parser.add_argument("--sizes", default="1000,10000,100000,1000000")
+    parser.add_argument("--rowwise-max", type=int, default=100000,
+                        help="skip the row-wise baseline above this many rows")
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'vectorized':>12} {'row-wise':>12}")
+    for n in map(int, args.sizes.split(",")):
+        df = synthetic(n)
+        vec = timed(lambda: normalize(df))
+        if n <= args.rowwise_max:
+            row = timed(lambda: df.dropna(subset=[CODE]).apply(
+                lambda r: make_filename(r[CODE], r[DATE]), axis=1))
+            row_s = f"{row:11.3f}s"
+        else:
+            row_s = f"{'-':>12}"
+        print(f"{n:>10} {vec:11.3f}s {row_s}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+import argparse
+import glob
+import os
+import time
+
+import html_parsers
+from local_server import load_records, render_index, render_record
+
+# Per-page parse time for each available HTML backend. Pages come from a
+# directory of saved fixtures (record-*.html / index-*.html) or, by
+# default, are rendered from data.json and padded with site-like chrome so
+# the parser has realistic amounts of markup to skip.
+#
+# fixtures/ holds a few record and index pages in the repository site's
+# full layout (head scripts, navigation, sidebar, per-field wrappers):
+#
+#   python bench_parsers.py --fixtures fixtures
+
+CHROME = ('<div class="nav"><ul>' + '<li><a href="/x">Link</a></li>' * 40 + "</ul></div>"
+          '<div class="sidebar">' + "<p>Lorem ipsum dolor sit amet.</p>" * 60 + "</div>")
+
+
+def padded(page, pad):
+    return page.replace("<body>", "<body>" + CHROME * pad, 1)
+
+
+def load_fixtures(directory):
+    records = [open(p, encoding="utf-8").read() for p in sorted(glob.glob(os.path.join(directory, "record-*.html")))]
+    indexes = [open(p, encoding="utf-8").read() for p in sorted(glob.glob(os.path.join(directory, "index-*.html")))]
+    return records, indexes
+
+
+def generate(data, pad):
+    rows = load_records(data)
+    records = [padded(render_record(r), pad) for r in rows]
+    numbered = list(enumerate(rows, start=1))
+    indexes = [padded(render_index(numbered[i:i + 25]), pad) for i in range(0, len(numbered), 25)]
+    return records, indexes
+
+
+def per_page(fn, pages, backend, repeat):
+    best = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for page in pages:
+            fn(page, backend)
+        elapsed = time.perf_counter() - t0
+        best = elapsed if best is None else min(best, elapsed)
+    return best / len(pages) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark HTML parsing backends")
+    parser.add_argument("--fixtures", default=None, help="directory of saved pages, e.g. fixtures")
+    parser.add_argument("--data", default="data.json")
+    parser.add_argument("--pad", type=int, default=4, help="chrome blocks added to generated pages")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.fixtures:
+        records, indexes = load_fixtures(args.fixtures)
+    else:
+        records, indexes = generate(args.data, args.pad)
+
+    reference = None
+    print(f"{len(records)} record pages, {len(indexes)} index pages")
+    print(f"{'backend':<12} {'record us/page':>15} {'index us/page':>15}")
+    for backend in html_parsers.available():
+        parsed = [html_parsers.parse_record(p, backend) for p in records]
+        if reference is None:
+            reference = parsed
+        elif parsed != reference:
+            print(f"warning: {backend} disagrees with {html_parsers.available()[0]}")
+        rec = per_page(html_parsers.parse_record, records, backend, args.repeat)
+        idx = per_page(html_parsers.pdf_links, indexes, backend, args.repeat) if indexes else 0.0
+        print(f"{backend:<12} {rec:15.1f} {idx:15.1f}")
+
+
+if __name__ == "__main__":
+    main()
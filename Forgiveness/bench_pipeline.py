@@ -0,0 +1,179 @@
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+
+from add_filenames import CODE, DATE, make_filename
+from local_server import load_records, make_server
+from pipeline import HERE, build_stages
+
+# End-to-end timings for every pipeline stage against a synthetic
+# collection served from local_server.py, so throughput can be tracked
+# without touching the real site:
+#
+#   python bench_pipeline.py --scales 1k,10k --out bench_results.json
+#
+# Records are generated from data.json's rows (new applicant codes, a
+# hearing every two years), served lazily with generated transcript PDFs,
+# and the stages from pipeline.py are run one at a time in a scratch
+# directory. Each run is appended to the results file with the commit it
+# was taken at and compared with the previous run at the same scale.
+
+# Stages whose scripts take --metrics; their per-stage breakdown is kept.
+METRICS = {"scrape", "normalize", "download", "extract", "reconcile"}
+
+
+def parse_scale(text):
+    text = text.strip().lower()
+    if text.endswith("k"):
+        return int(float(text[:-1]) * 1000)
+    return int(text)
+
+
+def synthetic_records(n, templates, hearings=3, seed=0):
+    rng = random.Random(seed)
+    start = datetime.date(2000, 1, 1)
+    records = []
+    for i in range(n):
+        record = dict(rng.choice(templates))
+        applicant, hearing = divmod(i, hearings)
+        date = start + datetime.timedelta(days=applicant % 3650 + 730 * hearing)
+        record[CODE] = f"SYN{applicant:07d}"
+        record[DATE] = date.isoformat()
+        record["Interview Type"] = "Initial" if hearing == 0 else "Reappearance"
+        record["Filename"] = make_filename(record[CODE], record[DATE])
+        records.append(record)
+    return records
+
+
+def git_commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=HERE,
+                             capture_output=True, text=True, check=True)
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_scale(n, templates, workdir, args):
+    records = synthetic_records(n, templates)
+    server = make_server(records, port=0, lazy=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address
+    base = f"http://{host}:{port}/trans/"
+
+    extra = {
+        "scrape": ["--end", str(n), "--rate", str(args.rate), "--concurrency", str(args.concurrency)],
+        "download": ["--rate", str(args.rate), "--concurrency", str(args.concurrency)],
+    }
+    os.makedirs(os.path.join(workdir, "metrics"), exist_ok=True)
+
+    results = {}
+    try:
+        for name, stage in build_stages(base, args.jobs).items():
+            if args.stages and name not in args.stages:
+                continue
+            command = stage.command() + extra.get(name, [])
+            metrics_path = os.path.join("metrics", name + ".json")
+            if name in METRICS:
+                command += ["--metrics", metrics_path]
+            t0 = time.perf_counter()
+            rc = subprocess.call(command, cwd=workdir, stdout=subprocess.DEVNULL)
+            elapsed = time.perf_counter() - t0
+
+            result = {"seconds": round(elapsed, 3), "returncode": rc,
+                      "records_per_second": round(n / elapsed, 1)}
+            if name in METRICS and os.path.exists(os.path.join(workdir, metrics_path)):
+                with open(os.path.join(workdir, metrics_path)) as f:
+                    result["metrics"] = json.load(f)["stages"]
+            results[name] = result
+            print(f"  {name:<14} {elapsed:9.2f}s {n / elapsed:10.1f} rec/s"
+                  + ("" if rc == 0 else f"  (exit {rc})"))
+    finally:
+        server.shutdown()
+        server.server_close()
+    return results
+
+
+def load_results(path):
+    if os.path.exists(path):
+        with open(path) as f:
+            return json.load(f)
+    return []
+
+
+def save_results(runs, path):
+    with open(path + ".tmp", "w") as f:
+        json.dump(runs, f, indent=1)
+    os.replace(path + ".tmp", path)
+
+
+def compare(previous, current, threshold):
+    for name, result in current["stages"].items():
+        before = previous["stages"].get(name)
+        if not before or before["returncode"] or result["returncode"]:
+            continue
+        ratio = result["seconds"] / before["seconds"] if before["seconds"] else 1.0
+        flag = "  REGRESSION" if ratio > 1 + threshold else ""
+        print(f"  {name:<14} {before['seconds']:9.2f}s -> {result['seconds']:9.2f}s "
+              f"({ratio:.2f}x vs {previous.get('commit')}){flag}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the pipeline on a synthetic collection")
+    parser.add_argument("--scales", default="1k", help="comma-separated record counts, e.g. 1k,10k,100k")
+    parser.add_argument("--data", default=os.path.join(HERE, "data.json"),
+                        help="records used as templates for the synthetic ones")
+    parser.add_argument("--stages", default=None, help="comma-separated subset of pipeline stages")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count())
+    parser.add_argument("--rate", type=float, default=1000.0,
+                        help="client request rate; the local server has no limit of its own")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--workdir", default=None, help="keep outputs here instead of a temp dir")
+    parser.add_argument("--out", default="bench_results.json")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="slowdown against the previous run that counts as a regression")
+    args = parser.parse_args()
+    args.stages = set(args.stages.split(",")) if args.stages else None
+
+    templates = load_records(args.data)
+    runs = load_results(args.out)
+
+    for n in map(parse_scale, args.scales.split(",")):
+        workdir = (os.path.join(args.workdir, str(n)) if args.workdir
+                   else tempfile.mkdtemp(prefix=f"bench-{n}-"))
+        os.makedirs(workdir, exist_ok=True)
+        print(f"{n} records in {workdir}")
+        try:
+            stages = run_scale(n, templates, workdir, args)
+        finally:
+            if not args.workdir:
+                shutil.rmtree(workdir)
+
+        run = {
+            "commit": git_commit(),
+            "created": datetime.datetime.now(datetime.timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "records": n,
+            "python": platform.python_version(),
+            "cpus": os.cpu_count(),
+            "jobs": args.jobs,
+            "stages": stages,
+        }
+        previous = [r for r in runs if r["records"] == n and r.get("jobs") == args.jobs]
+        if previous:
+            compare(previous[-1], run, args.threshold)
+        runs.append(run)
+        save_results(runs, args.out)
+
+    print(f"results appended to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
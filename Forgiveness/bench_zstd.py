@@ -0,0 +1,91 @@
+import argparse
+import gzip
+import os
+import shutil
+import tempfile
+import time
+
+import zstandard
+
+import zstd_text
+
+# Compares ways of storing the extracted transcripts: plain .txt, gzip,
+# zstd without a dictionary and zstd with a dictionary trained on a
+# sample of the transcripts. Reports the on-disk size and how fast every
+# file can be read back and decoded.
+
+
+def txt_files(directory):
+    return sorted(e.path for e in os.scandir(directory) if e.name.endswith(".txt") and e.is_file())
+
+
+def write_variant(paths, out_dir, suffix, encode):
+    os.makedirs(out_dir)
+    written = []
+    for path in paths:
+        with open(path, "rb") as f:
+            data = encode(f.read())
+        dest = os.path.join(out_dir, os.path.basename(path) + suffix)
+        with open(dest, "wb") as f:
+            f.write(data)
+        written.append(dest)
+    return written
+
+
+def read_all(paths, decode, repeat):
+    best = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        total = 0
+        for path in paths:
+            with open(path, "rb") as f:
+                total += len(decode(f.read()))
+        elapsed = time.perf_counter() - t0
+        best = elapsed if best is None else min(best, elapsed)
+    return total, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark transcript storage formats")
+    parser.add_argument("--txt", default="txt")
+    parser.add_argument("--samples", type=int, default=zstd_text.TRAIN_SAMPLES,
+                        help="transcripts used to train the dictionary")
+    parser.add_argument("--level", type=int, default=zstd_text.LEVEL)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    paths = txt_files(args.txt)
+    samples = []
+    for path in paths[:: max(1, len(paths) // args.samples)][:args.samples]:
+        with open(path, "rb") as f:
+            samples.append(f.read())
+    t0 = time.perf_counter()
+    zdict = zstd_text.train(samples)
+    print(f"{len(paths)} transcripts; dictionary of {len(zdict.as_bytes()) / 1024:.0f} KB "
+          f"trained on {len(samples)} in {time.perf_counter() - t0:.2f}s")
+
+    plain = zstandard.ZstdCompressor(level=args.level)
+    with_dict = zstandard.ZstdCompressor(level=args.level, dict_data=zdict)
+    variants = [
+        ("plain", "", lambda b: b, lambda b: b),
+        ("gzip", ".gz", lambda b: gzip.compress(b, 6), gzip.decompress),
+        ("zstd", ".zst", plain.compress, zstandard.ZstdDecompressor().decompress),
+        ("zstd+dict", ".zst", with_dict.compress,
+         zstandard.ZstdDecompressor(dict_data=zdict).decompress),
+    ]
+
+    work = tempfile.mkdtemp()
+    try:
+        print(f"{'format':<10} {'MB on disk':>11} {'ratio':>7} {'decode MB/s':>12}")
+        raw = sum(os.path.getsize(p) for p in paths)
+        for name, suffix, encode, decode in variants:
+            files = write_variant(paths, os.path.join(work, name), suffix, encode)
+            size = sum(os.path.getsize(p) for p in files)
+            total, elapsed = read_all(files, decode, args.repeat)
+            print(f"{name:<10} {size / 1e6:11.2f} {raw / size:7.2f} {total / 1e6 / elapsed:12.1f}")
+    finally:
+        shutil.rmtree(work)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,100 @@
-import pandas as pd 
-import numpy as np
+import argparse
+import json
 import os
+import time
 
-df = pd.read_json("data.json", orient="records", lines=True)
+import jsonl
+import zstd_text
+from metrics import Metrics
 
 
-dirr = "./txt/"
-for i, row in df.iterrows():
-    path = dirr + row["Filename"] 
-    if os.path.exists(path):
-        print("File exists!")
-    else:
-        print(f"File does not exist: {row}")
+def scan(directory, suffixes):
+    # One scandir pass; DirEntry.stat() reuses what the directory read
+    # already returned where the OS allows it. Compressed transcripts
+    # (.txt.zst) report the size of their text, read from the frame header.
+    sizes = {}
+    if not os.path.isdir(directory):
+        return sizes
+    if isinstance(suffixes, str):
+        suffixes = (suffixes,)
+    with os.scandir(directory) as it:
+        for entry in it:
+            suffix = next((s for s in suffixes if entry.name.endswith(s)), None)
+            if not suffix or not entry.is_file():
+                continue
+            size = entry.stat().st_size
+            if suffix.endswith(zstd_text.SUFFIX):
+                size = zstd_text.text_size(entry.path)
+            sizes[entry.name[:-len(suffix)]] = size
+    return sizes
 
-#df = df.dropna(subset=["Parole Applicant Code"])
-#df.to_json("d.json", orient="records", lines=True)
+
+def record_names(frames):
+    # The set of transcript names data.json expects, built from chunks of
+    # its Filename column so only the names themselves are held.
+    names = set()
+    rows = 0
+    for df in frames:
+        names.update(df["Filename"].dropna().str.removesuffix(".txt"))
+        rows += len(df)
+    return names, rows
+
+
+def reconcile(records, txt_dir, pdf_dir):
+    txt = scan(txt_dir, zstd_text.TEXT_SUFFIXES)
+    pdf = scan(pdf_dir, ".pdf")
+
+    txt_names = set(txt)
+    pdf_names = set(pdf)
+
+    return {
+        "records": len(records),
+        "txt_files": len(txt),
+        "pdf_files": len(pdf),
+        "missing_transcript": sorted(records - txt_names - pdf_names),
+        "failed_extraction": sorted((records & pdf_names) - txt_names),
+        "empty_txt": sorted(name for name, size in txt.items() if size == 0),
+        "empty_pdf": sorted(name for name, size in pdf.items() if size == 0),
+        "orphan_txt": sorted(txt_names - records),
+        "orphan_pdf": sorted(pdf_names - records),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reconcile data.json against txt/ and transcripts/")
+    parser.add_argument("--data", default="data.json")
+    parser.add_argument("--txt", default="./txt/")
+    parser.add_argument("--pdf", default="./transcripts/")
+    parser.add_argument("--out", default="reconcile.json")
+    parser.add_argument("--metrics", default=None, metavar="PATH",
+                        help="write per-stage timings as JSON (and OpenMetrics text "
+                             "alongside as .prom)")
+    args = parser.parse_args()
+
+    metrics = Metrics("clean_data")
+
+    with metrics.stage("load") as load:
+        records, load.items = record_names(jsonl.iter_frames(args.data, columns=["Filename"]))
+        load.bytes_in = os.path.getsize(args.data)
+
+    t0 = time.perf_counter()
+    with metrics.stage("reconcile") as stage:
+        report = reconcile(records, args.txt, args.pdf)
+        stage.items = report["records"]
+    elapsed = time.perf_counter() - t0
+
+    with metrics.stage("write") as write:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+        write.record(bytes_out=os.path.getsize(args.out))
+
+    for key, value in report.items():
+        print(f"{key}: {len(value) if isinstance(value, list) else value}")
+    print(f"reconciled in {elapsed * 1000:.1f} ms, report written to {args.out}")
+
+    if args.metrics:
+        metrics.write(args.metrics)
+
+
+if __name__ == "__main__":
+    main()
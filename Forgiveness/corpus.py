@@ -0,0 +1,150 @@
+import argparse
+import json
+import mmap
+import os
+import time
+
+import zstd_text
+
+# Packs the extracted transcripts in txt/ into one corpus file so scans
+# over the whole collection are a single sequential read instead of an
+# open/read/close per transcript.
+#
+#   corpus.bin       the transcripts' bytes back to back, in Filename order
+#   corpus.bin.idx   {"size": ..., "names": [...], "offsets": [...]}
+#
+# offsets has one more entry than names, so transcript i is the bytes
+# offsets[i]:offsets[i + 1]. Corpus mmaps the file and hands out
+# memoryview slices of it without copying.
+
+READ_SIZE = 1024 * 1024
+
+
+def index_path(corpus_path):
+    return str(corpus_path) + ".idx"
+
+
+def pack(txt_dir, corpus_path):
+    # Accepts plain .txt and pdf_to_txt.py --zstd output; the corpus
+    # always holds plain text, keyed by the .txt name.
+    files = {}
+    for e in os.scandir(txt_dir):
+        if e.is_file() and e.name.endswith(zstd_text.TEXT_SUFFIXES):
+            files[zstd_text.text_name(e.name)] = e.path
+    names = sorted(files)
+    offsets = [0]
+    tmp = str(corpus_path) + ".tmp"
+    with open(tmp, "wb") as out:
+        for name in names:
+            if files[name].endswith(zstd_text.SUFFIX):
+                out.write(zstd_text.read_bytes(files[name]))
+            else:
+                with open(files[name], "rb") as f:
+                    for block in iter(lambda: f.read(READ_SIZE), b""):
+                        out.write(block)
+            offsets.append(out.tell())
+
+    index = {"size": offsets[-1], "names": names, "offsets": offsets}
+    idx_tmp = index_path(corpus_path) + ".tmp"
+    with open(idx_tmp, "w") as f:
+        json.dump(index, f, separators=(",", ":"))
+    # The corpus goes into place first; a reader that sees the new corpus
+    # with the old index notices the size mismatch.
+    os.replace(tmp, corpus_path)
+    os.replace(idx_tmp, index_path(corpus_path))
+    return len(names), offsets[-1]
+
+
+class Corpus:
+    def __init__(self, path):
+        with open(index_path(path)) as f:
+            index = json.load(f)
+        self.names = index["names"]
+        offsets = index["offsets"]
+        self.index = {name: (offsets[i], offsets[i + 1] - offsets[i])
+                      for i, name in enumerate(self.names)}
+
+        self._file = open(path, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        if size != index["size"]:
+            self._file.close()
+            raise ValueError(f"{path} does not match its index; re-run corpus.py pack")
+        # mmap refuses empty files, and an empty corpus has nothing to slice.
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else None
+        self._view = memoryview(self._mmap) if size else memoryview(b"")
+        self.closed = False
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return name in self.index
+
+    def __getitem__(self, name):
+        # Zero-copy; a slice still alive at close() keeps the mapping open
+        # until it is released or garbage collected.
+        if self.closed:
+            raise ValueError("corpus is closed")
+        offset, length = self.index[name]
+        return self._view[offset:offset + length]
+
+    def text(self, name):
+        with self[name] as view:
+            return str(view, "utf-8", "replace")
+
+    def items(self):
+        # In file order, so iterating the whole corpus reads it front to back.
+        if self._mmap is not None and hasattr(mmap, "MADV_SEQUENTIAL"):
+            self._mmap.madvise(mmap.MADV_SEQUENTIAL)
+        for name in self.names:
+            yield name, self[name]
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            self._view.release()
+            if self._mmap is not None:
+                self._mmap.close()
+        except BufferError:
+            # Slices are still exported. Dropping our references leaves
+            # the unmap to whichever of them goes last, instead of failing
+            # here (and, from __exit__, replacing the caller's exception).
+            pass
+        self._view = self._mmap = None
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pack transcripts into one memory-mapped corpus")
+    parser.add_argument("--corpus", default="corpus.bin")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    pack_cmd = sub.add_parser("pack", help="concatenate txt/ into the corpus file")
+    pack_cmd.add_argument("--txt", default="txt")
+
+    get_cmd = sub.add_parser("get", help="print one transcript")
+    get_cmd.add_argument("filename")
+
+    args = parser.parse_args()
+
+    if args.command == "pack":
+        t0 = time.perf_counter()
+        count, size = pack(args.txt, args.corpus)
+        elapsed = time.perf_counter() - t0
+        print(f"{count} transcripts, {size / 1e6:.1f} MB packed into {args.corpus} "
+              f"in {elapsed:.2f}s")
+    else:
+        with Corpus(args.corpus) as corpus:
+            print(corpus.text(args.filename), end="")
+
+
+if __name__ == "__main__":
+    main()
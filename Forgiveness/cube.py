@@ -0,0 +1,216 @@
+import argparse
+import json
+import os
+import uuid
+from collections import Counter
+
+# Pre-aggregated hearing counts over Race x Decision x Facility x Year x
+# Interview Type, cached on disk so the Manim scenes can pull their numbers
+# without reading the raw records.
+#
+# The cube also remembers which cell each record (by Filename) landed in,
+# so a refresh only moves the records that were added, changed or removed.
+# That map is kept in its own file (cube.records.json next to cube.json);
+# the scenes only read the counts.
+
+DIMS = {
+    "race": "Race/Ethnicity",
+    "decision": "Decision",
+    "facility": "Facility",
+    "year": "Interview/Decision Date",
+    "interview_type": "Interview Type",
+}
+
+GRANTED = "Parole Granted"
+DENIED = "Parole Denied"
+
+# Figures the slides cite from outside studies (NYU's 2023 analysis and
+# Laqueur & Copus). They are used as-is unless a cube is supplied.
+STUDY_FIGURES = {
+    "hearings": 19713,
+    "released": 4168,
+    "release_rate": 0.21,
+    "white_rate": 0.45,
+    "poc_rate": 0.32,
+    "actual_rate": 0.20,
+    "wait_days": 730,
+    "denied_hearings": 5490,
+    "denied_days": 4007700,
+}
+
+
+def records_path(path):
+    root, ext = os.path.splitext(path)
+    return root + ".records" + ext
+
+
+def _load_json(path, default):
+    if not os.path.exists(path):
+        return default
+    with open(path) as f:
+        return json.load(f)
+
+
+def _dump_json(data, path):
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+
+def cell_key(record):
+    key = []
+    for dim, field in DIMS.items():
+        value = record.get(field)
+        if dim == "year" and value:
+            value = int(str(value)[:4])
+        key.append(value)
+    return key
+
+
+class Cube:
+    def __init__(self, cells=None, records=None):
+        self.cells = Counter(cells or {})
+        self.records = records or {}
+
+    @classmethod
+    def load(cls, path, records=False):
+        with open(path) as f:
+            data = json.load(f)
+        cells = {tuple(c[:-1]): c[-1] for c in data["cells"]}
+        if not records:
+            return cls(cells)
+        if "records" in data:
+            # Written before the map moved to its own file.
+            return cls(cells, data["records"])
+        saved = _load_json(records_path(path), {})
+        if saved.get("version") != data.get("version"):
+            # The two files are from different saves (a crash between
+            # them); start over so refresh rebuilds every cell.
+            return cls()
+        return cls(cells, saved["records"])
+
+    def save(self, path):
+        version = uuid.uuid4().hex
+        _dump_json({"version": version, "records": self.records}, records_path(path))
+        _dump_json({
+            "dims": list(DIMS),
+            "version": version,
+            "cells": [list(k) + [n] for k, n in self.cells.items() if n],
+        }, path)
+
+    def refresh(self, json_path):
+        seen = set()
+        changed = 0
+        with open(json_path) as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                name = record.get("Filename")
+                if not name:
+                    continue
+                seen.add(name)
+                key = cell_key(record)
+                old = self.records.get(name)
+                if old == key:
+                    continue
+                if old is not None:
+                    self.cells[tuple(old)] -= 1
+                self.cells[tuple(key)] += 1
+                self.records[name] = key
+                changed += 1
+        for name in set(self.records) - seen:
+            self.cells[tuple(self.records.pop(name))] -= 1
+            changed += 1
+        return changed
+
+    def _matches(self, key, filters):
+        for i, dim in enumerate(DIMS):
+            if dim not in filters:
+                continue
+            want = filters[dim]
+            if callable(want):
+                if not want(key[i]):
+                    return False
+            elif isinstance(want, (list, tuple, set, range)):
+                if key[i] not in want:
+                    return False
+            elif key[i] != want:
+                return False
+        return True
+
+    def total(self, **filters):
+        # total(race="White", decision="Parole Granted", year=range(2012, 2016))
+        return sum(n for key, n in self.cells.items() if n and self._matches(key, filters))
+
+    def slice(self, *by, **filters):
+        idx = [list(DIMS).index(d) for d in by]
+        out = Counter()
+        for key, n in self.cells.items():
+            if n and self._matches(key, filters):
+                out[tuple(key[i] for i in idx)] += n
+        return dict(out)
+
+    def release_rate(self, decision=(GRANTED, DENIED), **filters):
+        # Granted over decided; decision narrows which outcomes count as
+        # decided (e.g. decision=GRANTED gives 1.0 wherever there are any).
+        if isinstance(decision, str):
+            decision = (decision,)
+        decided = self.total(decision=decision, **filters)
+        if not decided:
+            return None
+        if GRANTED not in decision:
+            return 0.0
+        return self.total(decision=GRANTED, **filters) / decided
+
+
+def scene_stats(path=None, applicants=None, records=None):
+    # Values for the Forgiveness scenes. Without a cube the cited study
+    # figures are returned unchanged; an applicant index (applicants.py)
+    # supplies the wait between hearings and the records themselves
+    # (data.json or data.parquet) the days held after denials. "sources"
+    # names the inputs that replaced study figures, so the scenes can word
+    # sample counts as such.
+    stats = dict(STUDY_FIGURES, sources=set())
+    if records:
+        from durations import denied_totals
+        stats["denied_hearings"], stats["denied_days"] = denied_totals(records)
+        stats["sources"].add("records")
+    if applicants:
+        from applicants import HearingIndex
+        wait = HearingIndex.load(applicants).mean_wait()
+        if wait is not None:
+            stats["wait_days"] = wait
+            stats["sources"].add("applicants")
+    if not path:
+        return stats
+
+    cube = Cube.load(path)
+    decided = cube.total(decision=(GRANTED, DENIED))
+    released = cube.total(decision=GRANTED)
+    stats["hearings"] = cube.total()
+    stats["sources"].add("cube")
+    stats["released"] = released
+    stats["release_rate"] = released / decided if decided else 0.0
+    stats["actual_rate"] = stats["release_rate"]
+    stats["white_rate"] = cube.release_rate(race="White") or 0.0
+    stats["poc_rate"] = cube.release_rate(race=lambda r: r is not None and r != "White") or 0.0
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or refresh the aggregate cube")
+    parser.add_argument("--data", default="data.json")
+    parser.add_argument("--out", default="cube.json")
+    args = parser.parse_args()
+
+    cube = Cube.load(args.out, records=True) if os.path.exists(args.out) else Cube()
+    changed = cube.refresh(args.data)
+    cube.save(args.out)
+    print(f"{changed} records updated, {len(cube.records)} in cube, "
+          f"{sum(1 for n in cube.cells.values() if n)} cells")
+
+
+if __name__ == "__main__":
+    main()
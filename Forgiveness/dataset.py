@@ -0,0 +1,111 @@
+import argparse
+import time
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+import jsonl
+
+# Typed columnar copy of data.json. Categoricals are written as Arrow
+# dictionary columns, dates as real dates and Birth Year as a nullable int,
+# so consumers can memory-map the file and read only the columns they need
+# instead of re-parsing every JSON line.
+
+CATEGORICAL = [
+    "Issuing Body",
+    "Sex",
+    "Race/Ethnicity",
+    "Controlling Conviction",
+    "Aggregate Minimum Sentence",
+    "Aggregate Maximum Sentence",
+    "Facility",
+    "Interview Type",
+    "Form of Interview",
+    "Decision",
+    "Grounds for Denial",
+    "Hold Time/Duration",
+    "Document Type",
+    "Collection",
+    "Recommended Citation",
+    "Commissioners' Location",
+    "Dissenting Commissioner",
+    "Dissenting Vote",
+]
+
+DATES = ["Interview/Decision Date"]
+
+INTEGERS = {"Birth Year": "Int16"}
+
+
+def apply_types(df):
+    df = df.copy()
+    for col in CATEGORICAL:
+        if col in df:
+            df[col] = df[col].astype("category")
+    for col in DATES:
+        if col in df:
+            df[col] = pd.to_datetime(df[col], errors="coerce")
+    for col, dtype in INTEGERS.items():
+        if col in df:
+            df[col] = pd.to_numeric(df[col], errors="coerce").round().astype(dtype)
+    return df
+
+
+def fixed_schema(table):
+    # Schema of the first chunk with dictionary indices widened to int32 and
+    # all-null columns given their real type, so later chunks with more
+    # categories or values fit it. The pandas metadata (nullable Int16 etc.)
+    # is carried over.
+    fields = []
+    for field in table.schema:
+        t = field.type
+        if pa.types.is_dictionary(t):
+            value = pa.string() if pa.types.is_null(t.value_type) else t.value_type
+            t = pa.dictionary(pa.int32(), value)
+        elif pa.types.is_null(t):
+            t = (pa.timestamp("ns") if field.name in DATES else
+                 pa.int16() if field.name in INTEGERS else pa.string())
+        fields.append(pa.field(field.name, t))
+    return pa.schema(fields, metadata=table.schema.metadata)
+
+
+def export(json_path, parquet_path, row_group_size=64 * 1024):
+    # One chunk of records per row group, so memory is bounded by the
+    # chunk rather than the collection.
+    n = 0
+    schema = writer = None
+    try:
+        for chunk in jsonl.iter_frames(json_path, row_group_size):
+            if schema is None:
+                df = apply_types(chunk)
+                schema = fixed_schema(pa.Table.from_pandas(df, preserve_index=False))
+                writer = pq.ParquetWriter(parquet_path, schema, compression="zstd")
+            else:
+                df = apply_types(chunk.reindex(columns=schema.names))
+            writer.write_table(pa.Table.from_pandas(df, schema=schema, preserve_index=False))
+            n += len(df)
+    finally:
+        if writer:
+            writer.close()
+    return n
+
+
+def load(parquet_path="data.parquet", columns=None, filters=None):
+    table = pq.read_table(parquet_path, columns=columns, filters=filters, memory_map=True)
+    return table.to_pandas()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export data.json to typed Parquet")
+    parser.add_argument("--data", default="data.json")
+    parser.add_argument("--out", default="data.parquet")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    n = export(args.data, args.out)
+    print(f"{n} records written to {args.out} in {time.perf_counter() - t0:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
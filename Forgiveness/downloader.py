@@ -1,25 +1,221 @@
-import requests
+import argparse
+import asyncio
+import hashlib
 import os
 import re
-from bs4 import BeautifulSoup
+import tempfile
+import time
+from urllib.parse import urljoin
 
-#url = "https://ir.lawnet.fordham.edu/trans/"
-url = "https://ir.lawnet.fordham.edu/trans/index.2.html"
+import aiohttp
 
-resp = requests.get(url)
-soup = BeautifulSoup(resp.text, "html.parser")
+import html_parsers
+from fetcher import Fetcher, FetchError, load_failed, save_failed
+from http_archive import open_archive
+from metrics import Metrics
+from store import TranscriptStore
 
-pdf_link = soup.find_all("a", href=True, string="PDF")
+url = "https://ir.lawnet.fordham.edu/trans/"
 
+CHUNK_SIZE = 64 * 1024
 
-if pdf_link:
-    for link in pdf_link:
-        r = re.search(r".*? - (.*?)\)\s", link["aria-label"])
-        match = r[1]
-        filename = match.replace(r" (", "-")
-        filename = filename + ".pdf"
-        pdf_url = link["href"]
-        pdf_response = requests.get(pdf_url)
 
-        with open(os.path.join("transcripts", filename), "wb") as f:
-            f.write(pdf_response.content)
+def index_url(base, n):
+    if n == 1:
+        return base + "index.html"
+    return base + f"index.{n}.html"
+
+
+def pdf_filename(aria_label):
+    r = re.search(r".*? - (.*?)\)\s", aria_label)
+    match = r[1]
+    filename = match.replace(r" (", "-")
+    return filename + ".pdf"
+
+
+def pdf_links(html, page_url):
+    links = []
+    for aria_label, href in html_parsers.pdf_links(html):
+        links.append((pdf_filename(aria_label), urljoin(page_url, href)))
+    return links
+
+
+async def index_links(fetcher, base, metrics=None, start=1):
+    # Walk index.html, index.2.html, ... until a page is missing or empty.
+    # A page that still fails after retries ends the walk early; it is in
+    # fetcher.failed as {"kind": "index", "page": n}, and --retry-failed
+    # picks the walk up again from there.
+    index = (metrics or Metrics("downloader")).get("index")
+    links = []
+    n = start
+    while True:
+        page_url = index_url(base, n)
+        try:
+            with index.item() as item:
+                async with fetcher.get(page_url, context={"kind": "index", "page": n}) as resp:
+                    if resp.status != 200:
+                        break
+                    body = await resp.read()
+                    html = body.decode(resp.get_encoding())
+                    item.bytes_in = len(body)
+        except FetchError as e:
+            print(f"Failed to get index page: {e}")
+            break
+        page_links = pdf_links(html, page_url)
+        if not page_links:
+            break
+        links.extend(page_links)
+        n += 1
+    return links
+
+
+async def download_pdf(fetcher, pdf_url, path, chunk_size=CHUNK_SIZE, store=None, metrics=None):
+    # bytes_in is what came over the network (0 for a store checkout),
+    # bytes_out what landed in out_dir.
+    with (metrics or Metrics("downloader")).get("download").item() as item:
+        item.bytes_in = await _download_pdf(fetcher, pdf_url, path, chunk_size, store)
+        item.bytes_out = os.path.getsize(path)
+    return item.bytes_in
+
+
+async def _download_pdf(fetcher, pdf_url, path, chunk_size, store):
+    key = os.path.splitext(os.path.basename(path))[0]
+    if store and store.has(key, "pdf"):
+        store.checkout(key, "pdf", path)
+        return 0
+
+    # Stream into a temp file in the target directory and rename it into
+    # place, so memory stays flat and a partial download never looks done.
+    context = {"kind": "pdf", "filename": os.path.basename(path)}
+    async with fetcher.get(pdf_url, context=context) as resp:
+        if resp.status >= 400:
+            raise fetcher.fail(pdf_url, f"HTTP {resp.status}", context)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".part")
+        size = 0
+        digest = hashlib.sha256()
+        try:
+            with os.fdopen(fd, "wb") as f:
+                async for chunk in resp.content.iter_chunked(chunk_size):
+                    f.write(chunk)
+                    digest.update(chunk)
+                    size += len(chunk)
+            if store:
+                store.add_file(key, "pdf", tmp, digest.hexdigest(), url=pdf_url)
+                store.checkout(key, "pdf", path)
+            else:
+                os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            raise
+    return size
+
+
+async def download_all(base, out_dir, concurrency=8, chunk_size=CHUNK_SIZE, store=None,
+                       rate=20.0, retries=5, links=None, metrics=None, archive=None,
+                       index_from=None, failed=None):
+    # links: (filename, url) pairs to download instead of walking the
+    # index; with index_from set as well, the walk from that page is
+    # added to them.
+    os.makedirs(out_dir, exist_ok=True)
+    metrics = metrics or Metrics("downloader")
+    connector = aiohttp.TCPConnector(limit=concurrency)
+
+    async with aiohttp.ClientSession(connector=connector) as session:
+        fetcher = Fetcher(session, rate=rate, burst=max(1, int(rate)),
+                          concurrency=min(4, concurrency), max_concurrency=concurrency,
+                          retries=retries, archive=archive, failed=failed)
+        if links is None or index_from:
+            with metrics.stage("index"):
+                links = (links or []) + await index_links(fetcher, base, metrics, index_from or 1)
+        with metrics.stage("download"):
+            results = await asyncio.gather(
+                *(download_pdf(fetcher, pdf_url, os.path.join(out_dir, filename), chunk_size,
+                               store, metrics)
+                  for filename, pdf_url in links),
+                return_exceptions=True,
+            )
+
+    total = 0
+    for (filename, pdf_url), result in zip(links, results):
+        if isinstance(result, BaseException):
+            if not isinstance(result, FetchError):
+                # A dropped connection mid-body or a store error; FetchErrors
+                # are already in fetcher.failed.
+                result = fetcher.fail(pdf_url, repr(result),
+                                      {"kind": "pdf", "filename": filename})
+            print(f"Failed to download {result}")
+            continue
+        total += result
+    return len(links), total, fetcher
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Download transcript PDFs")
+    parser.add_argument("--base", default=url)
+    parser.add_argument("--out", default="transcripts")
+    parser.add_argument("--concurrency", type=int, default=8,
+                        help="upper bound for the adaptive concurrency")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--store", default=None,
+                        help="content-addressed store directory; skips PDFs already in it")
+    parser.add_argument("--rate", type=float, default=20.0,
+                        help="requests per second per host")
+    parser.add_argument("--retries", type=int, default=5)
+    parser.add_argument("--failed", default="failed_downloads.json",
+                        help="where PDFs that fail (error status, or still failing after "
+                             "retries) are written")
+    parser.add_argument("--retry-failed", default=None, metavar="PATH",
+                        help="only download the PDFs listed in a failed-download file")
+    parser.add_argument("--parser", default="auto", choices=["auto"] + html_parsers.BACKENDS,
+                        help="HTML parsing backend")
+    parser.add_argument("--metrics", default=None, metavar="PATH",
+                        help="write per-stage timings as JSON (and OpenMetrics text "
+                             "alongside as .prom)")
+    archive_mode = parser.add_mutually_exclusive_group()
+    archive_mode.add_argument("--record", default=None, metavar="PATH",
+                              help="append every response to a WARC archive for --replay")
+    archive_mode.add_argument("--replay", default=None, metavar="PATH",
+                              help="serve responses from a recorded archive instead of the network")
+    args = parser.parse_args()
+
+    html_parsers.configure(args.parser)
+
+    store = TranscriptStore(args.store) if args.store else None
+    links = index_from = None
+    if args.retry_failed:
+        entries = load_failed(args.retry_failed)
+        # Entries without a kind come from before index pages were recorded.
+        links = [(e["filename"], e["url"]) for e in entries if e.get("kind", "pdf") == "pdf"]
+        pages = [e["page"] for e in entries if e.get("kind") == "index"]
+        index_from = min(pages) if pages else None
+
+    metrics = Metrics("downloader")
+    archive = open_archive(args.record, args.replay)
+    failed = []
+    t0 = time.perf_counter()
+    try:
+        count, total, fetcher = asyncio.run(download_all(args.base, args.out, args.concurrency,
+                                                         args.chunk_size, store, args.rate,
+                                                         args.retries, links, metrics, archive,
+                                                         index_from, failed))
+    finally:
+        save_failed(failed, args.failed)
+        if archive:
+            archive.close()
+    elapsed = time.perf_counter() - t0
+
+    print(fetcher.summary())
+
+    if store:
+        store.save()
+
+    print(f"{count} PDFs, {total / 1e6:.1f} MB in {elapsed:.2f}s "
+          f"({total / 1e6 / elapsed:.1f} MB/s)")
+
+    if args.metrics:
+        metrics.write(args.metrics)
+
+
+if __name__ == "__main__":
+    main()
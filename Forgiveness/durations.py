@@ -0,0 +1,183 @@
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+import jsonl
+
+# Turns the free-text sentence and hold-time columns into numbers:
+#
+#   "15 years"             term     180 months
+#   "2 years, 4 months"    term      28 months
+#   "24 Months"            term      24 months
+#   "3 months or earlier"  term       3 months (the upper bound)
+#   "Life"                 life     NaN
+#   "Parole eligibility date" / "Until Parole Eligible"
+#                          eligibility NaN
+#   anything else / null   unknown  NaN
+#
+# The columns are highly repetitive, so each one is factorized and only its
+# distinct strings go through the regexes; the results are spread back to
+# every row with a single take over the codes.
+
+DURATIONS = {
+    "Aggregate Minimum Sentence": "min_sentence",
+    "Aggregate Maximum Sentence": "max_sentence",
+    "Hold Time/Duration": "hold",
+}
+
+DECISION = "Decision"
+DENIED = "Parole Denied"
+
+# 24 months is the 730 days the slides count with.
+DAYS_PER_MONTH = 365 / 12
+
+KINDS = ["term", "life", "eligibility", "unknown"]
+
+YEARS = r"(\d+(?:\.\d+)?)\s*years?"
+MONTHS = r"(\d+(?:\.\d+)?)\s*months?"
+
+
+def parse_values(values):
+    # values: array of distinct strings (may include None). Returns
+    # (months, kind codes) aligned with it.
+    text = pd.Series(values, dtype="string").str.strip().str.lower()
+    years = text.str.extract(YEARS, expand=False).astype("Float64")
+    months = text.str.extract(MONTHS, expand=False).astype("Float64")
+    total = (years.fillna(0) * 12 + months.fillna(0)).where(years.notna() | months.notna())
+
+    kind = np.full(len(text), KINDS.index("unknown"), dtype=np.int8)
+    kind[total.notna().to_numpy(dtype=bool)] = KINDS.index("term")
+    kind[(text == "life").fillna(False).to_numpy(dtype=bool)] = KINDS.index("life")
+    kind[text.str.contains("eligib").fillna(False).to_numpy(dtype=bool)] = KINDS.index("eligibility")
+    return total.to_numpy(dtype=float, na_value=np.nan), kind
+
+
+def parse_column(series):
+    codes, uniques = pd.factorize(series)
+    months, kind = parse_values(np.asarray(uniques, dtype=object))
+    # factorize marks nulls with -1; send them to an extra "unknown" slot.
+    months = np.append(months, np.nan)
+    kind = np.append(kind, KINDS.index("unknown"))
+    return months[codes], pd.Categorical.from_codes(kind[codes], KINDS)
+
+
+def parse_durations(df):
+    # Adds <name>_months, <name>_days and <name>_kind for each duration column.
+    out = {}
+    for column, name in DURATIONS.items():
+        if column not in df:
+            continue
+        months, kind = parse_column(df[column])
+        out[f"{name}_months"] = months
+        out[f"{name}_days"] = months * DAYS_PER_MONTH
+        out[f"{name}_kind"] = kind
+    return df.assign(**out)
+
+
+def denied_mask(df):
+    return (df[DECISION] == DENIED).to_numpy(dtype=bool)
+
+
+def denied_days(df):
+    # Total hold days imposed by denials; holds with no term are left out.
+    days = df["hold_days"].to_numpy(dtype=float)
+    return float(np.nansum(days[denied_mask(df)]))
+
+
+def days_by(df, by, days="hold_days", denied_only=True):
+    # Per-group hearings, total/mean/median/max days in one sort-and-reduce.
+    rows = df[denied_mask(df)] if denied_only else df
+    values = rows[days].to_numpy(dtype=float)
+    keep = ~np.isnan(values)
+    inverse, groups = pd.factorize(rows[by].to_numpy()[keep], sort=True, use_na_sentinel=False)
+    groups = np.asarray(groups, dtype=object)
+    values = values[keep]
+
+    count = np.bincount(inverse, minlength=len(groups))
+    total = np.bincount(inverse, weights=values, minlength=len(groups))
+
+    # Sorted by group then value, each group is a contiguous run, so the
+    # median and max are just positions within it.
+    sorted_values = values[np.lexsort((values, inverse))]
+    starts = np.concatenate(([0], np.cumsum(count)[:-1])).astype(int)
+    lower = sorted_values[starts + (count - 1) // 2]
+    upper = sorted_values[starts + count // 2]
+    largest = sorted_values[starts + count - 1]
+
+    return pd.DataFrame({
+        by: groups,
+        "hearings": count,
+        "total_days": total,
+        "mean_days": total / count,
+        "median_days": (lower + upper) / 2,
+        "max_days": largest,
+    }).sort_values("total_days", ascending=False, ignore_index=True)
+
+
+def iter_frames(path, columns=None, size=jsonl.CHUNK_SIZE):
+    # data.json or data.parquet, a chunk of rows at a time.
+    if str(path).endswith(".parquet"):
+        for batch in pq.ParquetFile(path).iter_batches(size, columns=columns):
+            yield batch.to_pandas()
+        return
+    yield from jsonl.iter_frames(path, size, columns)
+
+
+def denied_totals(path, size=jsonl.CHUNK_SIZE):
+    # (denials, days held after them) over a whole records file, parsed a
+    # chunk at a time.
+    hearings, days = 0, 0.0
+    for df in iter_frames(path, [DECISION, "Hold Time/Duration"], size):
+        df = parse_durations(df)
+        hearings += int(denied_mask(df).sum())
+        days += denied_days(df)
+    return hearings, days
+
+
+def summarize(path, by, size=jsonl.CHUNK_SIZE):
+    # For the CLI: kind counts per duration column over every row, and the
+    # denied rows (by, hold_days) that days_by() needs. Only those are kept
+    # from each chunk.
+    kinds = {name: pd.Series(0, index=KINDS) for name in DURATIONS.values()}
+    denied = []
+    rows = 0
+    # --by Decision would otherwise select the column twice.
+    keep = list(dict.fromkeys([by, DECISION, "hold_days"]))
+    for df in iter_frames(path, list(dict.fromkeys(list(DURATIONS) + [DECISION, by])), size):
+        df = parse_durations(df)
+        rows += len(df)
+        for name in kinds:
+            if f"{name}_kind" in df:
+                kinds[name] += df[f"{name}_kind"].value_counts().reindex(KINDS, fill_value=0)
+        denied.append(df.loc[denied_mask(df), keep])
+    if denied:
+        denied = pd.concat(denied, ignore_index=True)
+    else:
+        denied = pd.DataFrame(columns=keep)
+    return kinds, denied, rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parse sentences and hold times into days")
+    parser.add_argument("--data", default="data.json", help="data.json or data.parquet")
+    parser.add_argument("--by", default="Race/Ethnicity", help="column to break denied days down by")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    kinds, denied, rows = summarize(args.data, args.by)
+    elapsed = time.perf_counter() - t0
+
+    for name, counts in kinds.items():
+        if counts.sum():
+            print(f"{name}: " + ", ".join(f"{counts[k]} {k}" for k in KINDS if counts[k]))
+    days = denied_days(denied)
+    print(f"{len(denied):,} denials, {days:,.0f} days held "
+          f"({days / 365:,.0f} years); parsed {rows} rows in {elapsed * 1000:.1f} ms")
+    print(days_by(denied, args.by).to_string(index=False, float_format=lambda v: f"{v:,.0f}"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+import asyncio
+import json
+import random
+import time
+from contextlib import asynccontextmanager
+from urllib.parse import urlsplit
+
+import aiohttp
+import requests
+
+# Shared request scheduler for scraper.py and downloader.py:
+#
+#   - a token bucket per host caps the request rate
+#   - 429/5xx and connection errors are retried with exponential backoff
+#     and full jitter (Retry-After is honoured when the server sends it)
+#   - concurrency adapts AIMD-style: it creeps up while latency stays near
+#     the best seen, and halves on throttling or when latency climbs
+#   - URLs that still fail, or that answer with an error that isn't
+#     retried (404, 403, ...), are collected so they can be retried later
+#   - SyncFetcher applies the same retry policy to blocking requests, for
+#     the scraper's sequential mode
+#   - with an http_archive.HttpArchive attached, final responses are either
+#     recorded to it or served from it instead of the network
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+CONDITIONAL_HEADERS = ("If-None-Match", "If-Modified-Since")
+CHUNK_SIZE = 64 * 1024
+
+
+class FetchError(Exception):
+    def __init__(self, url, reason):
+        super().__init__(f"{url}: {reason}")
+        self.url = url
+        self.reason = reason
+
+
+class TokenBucket:
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def take(self):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class AdaptiveLimiter:
+    def __init__(self, initial=4, minimum=1, maximum=64, latency_factor=2.0):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.latency_factor = latency_factor
+        self.in_flight = 0
+        self.best_latency = None
+        self.last_decrease = 0.0
+        self.cond = asyncio.Condition()
+
+    async def acquire(self):
+        async with self.cond:
+            while self.in_flight >= int(self.limit):
+                await self.cond.wait()
+            self.in_flight += 1
+
+    async def release(self):
+        async with self.cond:
+            self.in_flight -= 1
+            self.cond.notify_all()
+
+    def on_success(self, latency):
+        if self.best_latency is None or latency < self.best_latency:
+            self.best_latency = latency
+        if latency > self.best_latency * self.latency_factor + 0.05:
+            self.decrease()
+        else:
+            # Additive increase: about +1 per "round" of limit requests.
+            self.limit = min(self.maximum, self.limit + 1 / self.limit)
+
+    def decrease(self):
+        # At most one halving per best-latency interval, so a burst of slow
+        # responses from the same round doesn't collapse the window.
+        now = time.monotonic()
+        if now - self.last_decrease < max(self.best_latency or 0.0, 0.1):
+            return
+        self.last_decrease = now
+        self.limit = max(self.minimum, self.limit / 2)
+
+
+class RetryPolicy:
+    # What Fetcher and SyncFetcher share: which responses to retry, how
+    # long to back off, and the list of URLs that never succeeded.
+    def __init__(self, retries=5, backoff=0.5, max_backoff=30.0, failed=None):
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        # Callers may pass their own list so it survives an exception
+        # that escapes the fetch loop.
+        self.failed = [] if failed is None else failed
+        self.retried = 0
+
+    def delay(self, attempt, retry_after=None):
+        if retry_after is not None:
+            return min(self.max_backoff, retry_after)
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    @staticmethod
+    def retry_after(headers):
+        value = headers.get("Retry-After")
+        return float(value) if value and value.isdigit() else None
+
+    def fail(self, url, reason, context=None):
+        self.failed.append({"url": url, "reason": reason, **(context or {})})
+        return FetchError(url, reason)
+
+    def save_failed(self, path):
+        save_failed(self.failed, path)
+
+
+class SyncFetcher(RetryPolicy):
+    def __init__(self, session=None, rate=10.0, retries=5, backoff=0.5, max_backoff=30.0,
+                 failed=None):
+        super().__init__(retries, backoff, max_backoff, failed)
+        self.session = session or requests.Session()
+        self.interval = 1 / rate if rate else 0.0
+        self.last = 0.0
+
+    def get(self, url, context=None, **kwargs):
+        # Returns the first response that isn't retried; one request at a
+        # time, spaced at least 1/rate apart.
+        reason = None
+        for attempt in range(self.retries + 1):
+            if attempt:
+                self.retried += 1
+            time.sleep(max(0.0, self.last + self.interval - time.monotonic()))
+            self.last = time.monotonic()
+            try:
+                resp = self.session.get(url, **kwargs)
+            except requests.RequestException as e:
+                reason = repr(e)
+                time.sleep(self.delay(attempt))
+                continue
+            if resp.status_code in RETRY_STATUS:
+                reason = f"HTTP {resp.status_code}"
+                time.sleep(self.delay(attempt, self.retry_after(resp.headers)))
+                continue
+            return resp
+        raise self.fail(url, reason, context)
+
+    def summary(self):
+        return f"{self.retried} retries, {len(self.failed)} failed"
+
+
+class Fetcher(RetryPolicy):
+    def __init__(self, session, rate=10.0, burst=10, concurrency=4, max_concurrency=64,
+                 retries=5, backoff=0.5, max_backoff=30.0, archive=None, failed=None):
+        super().__init__(retries, backoff, max_backoff, failed)
+        self.session = session
+        self.archive = archive
+        self.rate = rate
+        self.burst = burst
+        self.limiter = AdaptiveLimiter(concurrency, maximum=max_concurrency)
+        self.buckets = {}
+
+    def bucket(self, url):
+        host = urlsplit(url).netloc
+        if host not in self.buckets:
+            self.buckets[host] = TokenBucket(self.rate, self.burst)
+        return self.buckets[host]
+
+    @asynccontextmanager
+    async def get(self, url, context=None, **kwargs):
+        # Yields the response once it is one we won't retry. The limiter
+        # slot is held until the caller has finished reading the body.
+        if self.archive is not None and self.archive.replay:
+            resp = self.archive.get(url, kwargs.get("headers"))
+            if resp is None:
+                raise self.fail(url, "not in archive", context)
+            yield resp
+            return
+        if self.archive is not None:
+            # Record full bodies, not 304s that only make sense to this
+            # run's cache; replay answers conditional requests itself.
+            headers = {k: v for k, v in (kwargs.get("headers") or {}).items()
+                       if k not in CONDITIONAL_HEADERS}
+            kwargs = {**kwargs, "headers": headers}
+
+        reason = None
+        for attempt in range(self.retries + 1):
+            if attempt:
+                self.retried += 1
+            await self.bucket(url).take()
+            await self.limiter.acquire()
+            released = False
+            try:
+                t0 = time.monotonic()
+                try:
+                    resp = await self.session.get(url, **kwargs)
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    reason = repr(e)
+                    self.limiter.decrease()
+                    await self.limiter.release()
+                    released = True
+                    await asyncio.sleep(self.delay(attempt))
+                    continue
+
+                if resp.status in RETRY_STATUS:
+                    reason = f"HTTP {resp.status}"
+                    retry_after = self.retry_after(resp.headers)
+                    resp.release()
+                    self.limiter.decrease()
+                    await self.limiter.release()
+                    released = True
+                    await asyncio.sleep(self.delay(attempt, retry_after))
+                    continue
+
+                if self.archive is not None:
+                    # Stream the body to the archive's spool rather than
+                    # holding a whole PDF in memory; the caller then reads
+                    # it back from the archive file.
+                    with self.archive.spool() as spool:
+                        try:
+                            async for chunk in resp.content.iter_chunked(CHUNK_SIZE):
+                                spool.write(chunk)
+                        finally:
+                            resp.release()
+                        resp = self.archive.add(url, resp.status, list(resp.headers.items()),
+                                                spool)
+                self.limiter.on_success(time.monotonic() - t0)
+                try:
+                    yield resp
+                finally:
+                    resp.release()
+                return
+            finally:
+                if not released:
+                    await self.limiter.release()
+
+        raise self.fail(url, reason, context)
+
+    def summary(self):
+        text = (f"concurrency {self.limiter.limit:.1f}, {self.retried} retries, "
+                f"{len(self.failed)} failed")
+        if self.archive is not None:
+            text += f"; {self.archive.summary()}"
+        return text
+
+
+def save_failed(entries, path):
+    with open(path, "w") as f:
+        json.dump(entries, f, indent=1)
+
+
+def load_failed(path):
+    with open(path) as f:
+        return json.load(f)
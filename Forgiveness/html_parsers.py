@@ -0,0 +1,118 @@
+from bs4 import BeautifulSoup, SoupStrainer
+
+# Parsing backends for the two things we read from the repository's pages:
+# the #alpha h2/value pairs on a record page and the "PDF" links on an
+# index page. Each backend only builds the part of the document it needs.
+#
+#   selectolax   fastest; optional (pip install selectolax)
+#   lxml         lxml.html directly; optional (pip install lxml)
+#   bs4-lxml     BeautifulSoup on lxml, limited with a SoupStrainer
+#   html.parser  BeautifulSoup on the stdlib parser, limited likewise
+#
+# "auto" picks the first one that is installed.
+
+try:
+    from selectolax.lexbor import LexborHTMLParser as HTMLParser
+except ImportError:
+    try:
+        from selectolax.parser import HTMLParser
+    except ImportError:
+        HTMLParser = None
+
+try:
+    import lxml.html
+except ImportError:
+    lxml = None
+
+BACKENDS = ["selectolax", "lxml", "bs4-lxml", "html.parser"]
+
+ALPHA = SoupStrainer(id="alpha")
+PDF_LINKS = SoupStrainer("a", href=True)
+
+
+def available():
+    names = []
+    if HTMLParser is not None:
+        names.append("selectolax")
+    if lxml is not None:
+        names += ["lxml", "bs4-lxml"]
+    names.append("html.parser")
+    return names
+
+
+def resolve(backend):
+    if backend == "auto":
+        return available()[0]
+    if backend not in available():
+        raise ValueError(f"parser backend not available: {backend}")
+    return backend
+
+
+_default = "auto"
+
+
+def configure(backend):
+    global _default
+    _default = resolve(backend)
+
+
+def _bs4_record(html, features):
+    soup = BeautifulSoup(html, features, parse_only=ALPHA)
+    alpha = soup.find(id="alpha")
+    ind_map = {}
+    if alpha is None:
+        return ind_map
+    for h2 in alpha.find_all("h2"):
+        # The value is the next element after the heading; the old
+        # next_sibling.next_sibling assumed exactly one whitespace node
+        # in between and .string returned None for nested markup.
+        value = h2.find_next_sibling()
+        ind_map[h2.get_text()] = None if value is None or value.name == "h2" else value.get_text()
+    return ind_map
+
+
+def _lxml_record(html):
+    alpha = lxml.html.fromstring(html).xpath('//*[@id="alpha"]')
+    ind_map = {}
+    if not alpha:
+        return ind_map
+    for h2 in alpha[0].iter("h2"):
+        value = h2.getnext()
+        ind_map[h2.text_content()] = None if value is None or value.tag == "h2" else value.text_content()
+    return ind_map
+
+
+def _selectolax_record(html):
+    alpha = HTMLParser(html).css_first("#alpha")
+    ind_map = {}
+    if alpha is None:
+        return ind_map
+    for h2 in alpha.css("h2"):
+        value = h2.next
+        while value is not None and value.tag == "-text":
+            value = value.next
+        ind_map[h2.text()] = None if value is None or value.tag == "h2" else value.text()
+    return ind_map
+
+
+def parse_record(html, backend=None):
+    backend = resolve(backend or _default)
+    if backend == "selectolax":
+        return _selectolax_record(html)
+    if backend == "lxml":
+        return _lxml_record(html)
+    return _bs4_record(html, "lxml" if backend == "bs4-lxml" else "html.parser")
+
+
+def pdf_links(html, backend=None):
+    # [(aria-label, href)] for every <a> whose text is exactly "PDF".
+    backend = resolve(backend or _default)
+    if backend == "selectolax":
+        return [(a.attributes.get("aria-label"), a.attributes["href"])
+                for a in HTMLParser(html).css("a[href]") if a.text() == "PDF"]
+    if backend == "lxml":
+        return [(a.get("aria-label"), a.get("href"))
+                for a in lxml.html.fromstring(html).xpath('//a[@href][.="PDF"]')]
+    features = "lxml" if backend == "bs4-lxml" else "html.parser"
+    soup = BeautifulSoup(html, features, parse_only=PDF_LINKS)
+    return [(a.get("aria-label"), a["href"]) for a in soup.find_all("a", href=True, string="PDF")]
@@ -0,0 +1,240 @@
+import io
+import os
+import shutil
+import tempfile
+import uuid
+from datetime import datetime, timezone
+from http import HTTPStatus
+
+from multidict import CIMultiDict, CIMultiDictProxy
+
+from fetcher import FetchError
+
+# Record-and-replay archive for the Fetcher, so scraper.py and downloader.py
+# can be re-run without the network.
+#
+#   record   every final response (HTML and PDFs) is appended to a WARC file
+#            as a "response" record holding the full HTTP message
+#   replay   responses are served from that file at disk speed, skipping
+#            the rate limiter; a URL that was never recorded fails like an
+#            unreachable page
+#
+# The file is plain WARC/1.0, one uncompressed record per response, so
+# standard WARC tools can read it. On open it is scanned once to build a
+# URL -> record index; the latest record for a URL wins. A record cut short
+# by a crash is dropped (and, in record mode, truncated away).
+#
+# While recording, a body is streamed into a spool (memory up to
+# SPOOL_SIZE, a temp file beyond) and copied into the archive once it is
+# complete: the WARC header needs its length up front, and concurrent
+# downloads must not interleave their records.
+
+RECORD = "record"
+REPLAY = "replay"
+
+CHUNK_SIZE = 64 * 1024
+SPOOL_SIZE = 1024 * 1024
+
+# Headers that describe the wire encoding rather than the stored body.
+HOP_HEADERS = {"content-encoding", "transfer-encoding", "content-length", "connection"}
+
+
+class ArchivedResponse:
+    # The parts of aiohttp's ClientResponse that scraper.py and
+    # downloader.py use.
+    def __init__(self, url, status, headers, body=None, source=None):
+        self.url = url
+        self.status = status
+        self.headers = CIMultiDictProxy(CIMultiDict(headers))
+        self._body = body
+        self._source = source  # (path, offset, length) when the body is on disk
+        self.content = _Content(self)
+
+    def _chunks(self, size):
+        if self._body is not None:
+            for i in range(0, len(self._body), size):
+                yield self._body[i:i + size]
+            return
+        path, offset, length = self._source
+        with open(path, "rb") as f:
+            f.seek(offset)
+            while length > 0:
+                block = f.read(min(size, length))
+                if not block:
+                    break
+                length -= len(block)
+                yield block
+
+    async def read(self):
+        if self._body is None:
+            self._body = b"".join(self._chunks(CHUNK_SIZE))
+        return self._body
+
+    def get_encoding(self):
+        content_type = self.headers.get("Content-Type", "")
+        for part in content_type.split(";")[1:]:
+            key, _, value = part.strip().partition("=")
+            if key.lower() == "charset" and value:
+                return value.strip('"')
+        return "utf-8"
+
+    async def text(self, encoding=None):
+        return (await self.read()).decode(encoding or self.get_encoding(), "replace")
+
+    def raise_for_status(self):
+        if self.status >= 400:
+            raise FetchError(self.url, f"HTTP {self.status}")
+
+    def release(self):
+        pass
+
+
+class _Content:
+    def __init__(self, response):
+        self.response = response
+
+    async def iter_chunked(self, size):
+        for chunk in self.response._chunks(size):
+            yield chunk
+
+
+def _http_message(status, headers, length):
+    try:
+        reason = HTTPStatus(status).phrase
+    except ValueError:
+        reason = ""
+    lines = [f"HTTP/1.1 {status} {reason}"]
+    lines += [f"{k}: {v}" for k, v in headers if k.lower() not in HOP_HEADERS]
+    lines.append(f"Content-Length: {length}")
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+
+def open_archive(record=None, replay=None):
+    # From the scripts' --record / --replay flags; None when neither is set.
+    if record:
+        return HttpArchive(record, RECORD)
+    if replay:
+        return HttpArchive(replay, REPLAY)
+    return None
+
+
+class HttpArchive:
+    def __init__(self, path, mode):
+        if mode not in (RECORD, REPLAY):
+            raise ValueError(f"unknown archive mode: {mode}")
+        self.path = path
+        self.mode = mode
+        self.index = {}
+        self.recorded = 0
+        self.replayed = 0
+        self.misses = 0
+        if os.path.exists(path):
+            end = self._scan()
+            if mode == RECORD and end != os.path.getsize(path):
+                with open(path, "rb+") as f:
+                    f.truncate(end)
+        elif mode == REPLAY:
+            raise FileNotFoundError(path)
+        else:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._out = open(path, "ab") if mode == RECORD else None
+
+    @property
+    def replay(self):
+        return self.mode == REPLAY
+
+    def _scan(self):
+        # Returns the offset just past the last complete record.
+        size = os.path.getsize(self.path)
+        end = 0
+        with open(self.path, "rb") as f:
+            while True:
+                line = f.readline()
+                if not line.startswith(b"WARC/"):
+                    break
+                fields = {}
+                for line in iter(f.readline, b""):
+                    if line in (b"\r\n", b"\n"):
+                        break
+                    key, _, value = line.decode("utf-8").partition(":")
+                    fields[key.strip().lower()] = value.strip()
+                payload = f.tell()
+                length = int(fields.get("content-length", -1))
+                if length < 0 or payload + length + 4 > size:
+                    break
+                if fields.get("warc-type") == "response":
+                    status, headers, body_offset = self._parse_head(f)
+                    self.index[fields["warc-target-uri"]] = (
+                        status, headers, body_offset, payload + length - body_offset)
+                f.seek(payload + length + 4)
+                end = f.tell()
+        return end
+
+    @staticmethod
+    def _parse_head(f):
+        status_line = f.readline().decode("latin-1")
+        status = int(status_line.split()[1])
+        headers = []
+        for line in iter(f.readline, b""):
+            if line in (b"\r\n", b"\n"):
+                break
+            key, _, value = line.decode("latin-1").partition(":")
+            headers.append((key.strip(), value.strip()))
+        return status, headers, f.tell()
+
+    def get(self, url, request_headers=None):
+        entry = self.index.get(url)
+        if entry is None:
+            self.misses += 1
+            return None
+        status, headers, offset, length = entry
+        self.replayed += 1
+        # Answer conditional requests the way the server would.
+        etag = dict((k.lower(), v) for k, v in headers).get("etag")
+        if etag and request_headers and request_headers.get("If-None-Match") == etag:
+            return ArchivedResponse(url, 304, [("ETag", etag)], body=b"")
+        return ArchivedResponse(url, status, headers, source=(self.path, offset, length))
+
+    def spool(self):
+        # Where Fetcher streams a body before handing it to add().
+        return tempfile.SpooledTemporaryFile(max_size=SPOOL_SIZE,
+                                             dir=os.path.dirname(self.path) or ".")
+
+    def add(self, url, status, headers, body):
+        # body is bytes or a file object such as spool(); a file is read
+        # from the start in CHUNK_SIZE blocks.
+        if isinstance(body, bytes):
+            body = io.BytesIO(body)
+        length = body.seek(0, os.SEEK_END)
+        body.seek(0)
+        http = _http_message(status, headers, length)
+        block = (
+            "WARC/1.0\r\n"
+            "WARC-Type: response\r\n"
+            f"WARC-Record-ID: <urn:uuid:{uuid.uuid4()}>\r\n"
+            f"WARC-Date: {datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')}\r\n"
+            f"WARC-Target-URI: {url}\r\n"
+            "Content-Type: application/http; msgtype=response\r\n"
+            f"Content-Length: {len(http) + length}\r\n"
+            "\r\n"
+        ).encode("utf-8")
+        start = self._out.tell()
+        self._out.write(block + http)
+        shutil.copyfileobj(body, self._out, CHUNK_SIZE)
+        self._out.write(b"\r\n\r\n")
+        self._out.flush()
+        stored = [(k, v) for k, v in headers if k.lower() not in HOP_HEADERS]
+        stored.append(("Content-Length", str(length)))
+        offset = start + len(block) + len(http)
+        self.index[url] = (status, stored, offset, length)
+        self.recorded += 1
+        return ArchivedResponse(url, status, stored, source=(self.path, offset, length))
+
+    def summary(self):
+        if self.replay:
+            return f"archive: {self.replayed} replayed, {self.misses} not in archive"
+        return f"archive: {self.recorded} responses recorded to {self.path}"
+
+    def close(self):
+        if self._out:
+            self._out.close()
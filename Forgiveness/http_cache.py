@@ -0,0 +1,52 @@
+import json
+import os
+
+
+class ResponseCache:
+    """Persistent per-URL cache of validators and parsed record pages.
+
+    Entries hold the ETag/Last-Modified the server sent alongside the parsed
+    ind_map, so later runs can send conditional requests and reuse the parse
+    when the server answers 304 Not Modified.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self.entries = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                self.entries = json.load(f)
+
+    def conditional_headers(self, url):
+        entry = self.entries.get(url)
+        if entry is None:
+            return {}
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def hit(self, url):
+        self.hits += 1
+        return self.entries[url]["ind_map"]
+
+    def store(self, url, headers, ind_map):
+        self.misses += 1
+        self.entries[url] = {
+            "etag": headers.get("ETag"),
+            "last_modified": headers.get("Last-Modified"),
+            "ind_map": ind_map,
+        }
+
+    def save(self):
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.entries, f)
+        os.replace(tmp, self.path)
+
+    def summary(self):
+        return f"cache: {self.hits} hits, {self.misses} misses"
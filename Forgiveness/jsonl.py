@@ -0,0 +1,161 @@
+import json
+import os
+
+import pandas as pd
+
+# Streaming JSON-lines layer for the record files (data1.json, data.json).
+#
+#   RecordWriter   appends one record per line and flushes it, so whatever
+#                  was written before a crash is still on disk
+#   iter_records   yields records one at a time
+#   iter_chunks    yields lists of CHUNK_SIZE records
+#   iter_frames    the same chunks as DataFrames
+#
+# A writer killed mid-line leaves a torn last line. Both sides apply the
+# same rule to a last line without a newline: if it parses it is a whole
+# record (readers yield it, an appending writer adds the newline), and if
+# not it is torn (readers stop at it, an appending writer cuts it off).
+
+CHUNK_SIZE = 10_000
+
+
+def iter_lines(path):
+    # (byte offset, line) for every complete, non-blank line.
+    offset = 0
+    with open(path, "rb") as f:
+        for line in f:
+            start = offset
+            offset += len(line)
+            if not line.endswith(b"\n"):
+                try:
+                    json.loads(line)
+                except json.JSONDecodeError:
+                    return
+            if line.strip():
+                yield start, line
+
+
+def iter_records(path):
+    for _, line in iter_lines(path):
+        yield json.loads(line)
+
+
+def iter_chunks(records, size=CHUNK_SIZE):
+    # records: a path or any iterable of records.
+    if isinstance(records, (str, os.PathLike)):
+        records = iter_records(records)
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def iter_frames(records, size=CHUNK_SIZE, columns=None):
+    for chunk in iter_chunks(records, size):
+        if columns is not None:
+            chunk = [{c: r.get(c) for c in columns} for r in chunk]
+        yield pd.DataFrame.from_records(chunk, columns=columns)
+
+
+def read_frame(path, columns=None, size=CHUNK_SIZE):
+    # Whole file as one DataFrame, for callers that need every row at once
+    # (it is as big as the file's selected columns). Parsing goes a chunk
+    # at a time, so pass columns to avoid ever holding the others.
+    frames = list(iter_frames(path, size, columns))
+    if not frames:
+        return pd.DataFrame(columns=columns)
+    return pd.concat(frames, ignore_index=True)
+
+
+def last_offsets(path, key):
+    # {record[key]: offset of its last line}, for de-duplicating an
+    # append-only file without holding the records themselves.
+    offsets = {}
+    for offset, line in iter_lines(path):
+        offsets[json.loads(line)[key]] = offset
+    return offsets
+
+
+def read_at(path, offsets):
+    with open(path, "rb") as f:
+        for offset in offsets:
+            f.seek(offset)
+            yield json.loads(f.readline())
+
+
+def is_json_lines(path):
+    # The old scraper output is one indented JSON object; its first line
+    # is a lone "{" rather than a whole record.
+    with open(path, "rb") as f:
+        for line in f:
+            if line.strip():
+                try:
+                    return isinstance(json.loads(line), dict)
+                except json.JSONDecodeError:
+                    return False
+    return True
+
+
+def _end_last_line(path):
+    # Make the file end on a newline before appending, following the rule
+    # iter_lines reads by: finish a last line that parses, cut a torn one.
+    with open(path, "rb+") as f:
+        size = f.seek(0, os.SEEK_END)
+        if not size:
+            return
+        f.seek(max(0, size - 1))
+        if f.read(1) == b"\n":
+            return
+        # Walk back to the last newline.
+        pos = size
+        start = 0
+        while pos > 0:
+            step = min(64 * 1024, pos)
+            f.seek(pos - step)
+            block = f.read(step)
+            nl = block.rfind(b"\n")
+            if nl >= 0:
+                start = pos - step + nl + 1
+                break
+            pos -= step
+        f.seek(start)
+        try:
+            json.loads(f.read())
+        except json.JSONDecodeError:
+            f.truncate(start)
+        else:
+            f.write(b"\n")
+
+
+class RecordWriter:
+    def __init__(self, path, append=False):
+        self.path = path
+        if append and os.path.exists(path):
+            _end_last_line(path)
+        self.f = open(path, "a" if append else "w", encoding="utf-8")
+        self.count = 0
+
+    def write(self, record):
+        self.f.write(json.dumps(record) + "\n")
+        self.f.flush()
+        self.count += 1
+
+    def write_frame(self, df):
+        if len(df):
+            text = df.to_json(orient="records", lines=True)
+            self.f.write(text if text.endswith("\n") else text + "\n")
+            self.f.flush()
+            self.count += len(df)
+
+    def close(self):
+        self.f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
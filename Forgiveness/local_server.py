@@ -0,0 +1,245 @@
+import argparse
+import hashlib
+import html
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Stand-in for https://ir.lawnet.fordham.edu/trans/ so the scraper and
+# downloader can be run and timed without touching the real site. Record
+# pages are rendered from the records in data.json using the same #alpha
+# h2/p layout, index pages list "PDF" links the way the real site does,
+# and each link serves a small generated transcript PDF. --fault-rate and
+# --rate-limit inject 503s and 429s to exercise the retry scheduler.
+
+PER_INDEX_PAGE = 25
+
+
+def load_records(path):
+    records = []
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                records.append(json.loads(line))
+    return records
+
+
+def render_record(record):
+    rows = []
+    for key, value in record.items():
+        if key == "Filename" or value is None:
+            continue
+        rows.append(f"<h2>{html.escape(key)}</h2>\n<p>{html.escape(str(value))}</p>\n")
+    return (
+        "<html><head><title>Record</title></head><body>\n"
+        f'<div id="alpha">\n{"".join(rows)}</div>\n'
+        "</body></html>\n"
+    )
+
+
+def render_index(entries):
+    rows = []
+    for i, record in entries:
+        code = html.escape(str(record.get("Parole Applicant Code")))
+        date = html.escape(str(record.get("Interview/Decision Date")))
+        rows.append(
+            f'<p class="article-listing"><a href="/trans/{i}">{code}</a> '
+            f'<a href="/cgi/viewcontent.cgi?article={i}&amp;context=trans" '
+            f'aria-label="Parole transcript - {code} ({date}) PDF">PDF</a></p>\n'
+        )
+    return (
+        "<html><head><title>Parole Interview Transcripts</title></head><body>\n"
+        f'<div id="series-home">\n{"".join(rows)}</div>\n'
+        "</body></html>\n"
+    )
+
+
+def make_pdf(lines, lines_per_page=40):
+    # Minimal uncompressed PDF with one Helvetica text stream per page;
+    # enough for pdfminer to extract the lines back out.
+    pages = [lines[i:i + lines_per_page] for i in range(0, len(lines), lines_per_page)] or [[]]
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None,
+               "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for page in pages:
+        text = ["BT /F1 10 Tf 12 TL 50 760 Td"]
+        for line in page:
+            escaped = line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+            text.append(f"({escaped}) '")
+        text.append("ET")
+        stream = "\n".join(text)
+        objects.append(f"<< /Length {len(stream.encode('latin-1'))} >>\nstream\n{stream}\nendstream")
+        content_num = len(objects)
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {content_num} 0 R >>")
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for num, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{num} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("latin-1")
+    for offset in offsets:
+        out += f"{offset:010d} 00000 n \n".encode("latin-1")
+    out += (f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\n"
+            f"startxref\n{xref}\n%%EOF\n").encode("latin-1")
+    return bytes(out)
+
+
+def transcript_lines(record, pages=3):
+    code = record.get("Parole Applicant Code")
+    lines = ["STATE OF NEW YORK - BOARD OF PAROLE",
+             f"Parole Board Interview - {code}",
+             f"{record.get('Facility')} Correctional Facility",
+             f"{record.get('Interview/Decision Date')}"]
+    for n in range(pages * 40 - len(lines)):
+        speaker = "COMMISSIONER" if n % 2 == 0 else "INMATE"
+        lines.append(f"{speaker}: Line {n} of the hearing transcript for {code}.")
+    return lines
+
+
+def build_pages(records):
+    # Everything rendered up front; fine for data.json-sized collections.
+    pages = {}
+    for i, record in enumerate(records, start=1):
+        pages[f"/trans/{i}"] = (render_record(record).encode("utf-8"), "text/html; charset=utf-8")
+        pages[f"/cgi/viewcontent.cgi?article={i}&context=trans"] = (
+            make_pdf(transcript_lines(record)), "application/pdf")
+
+    numbered = list(enumerate(records, start=1))
+    for n, start in enumerate(range(0, len(numbered), PER_INDEX_PAGE), start=1):
+        name = "/trans/index.html" if n == 1 else f"/trans/index.{n}.html"
+        body = render_index(numbered[start:start + PER_INDEX_PAGE])
+        pages[name] = (body.encode("utf-8"), "text/html; charset=utf-8")
+    return pages
+
+
+class LazyPages:
+    # Same paths as build_pages, rendered per request, so a synthetic
+    # collection of 100k records doesn't need its PDFs held in memory.
+    RECORD = re.compile(r"^/trans/(\d+)$")
+    PDF = re.compile(r"^/cgi/viewcontent\.cgi\?article=(\d+)&context=trans$")
+    INDEX = re.compile(r"^/trans/index(?:\.(\d+))?\.html$")
+
+    def __init__(self, records, pdf_pages=3):
+        self.records = records
+        self.pdf_pages = pdf_pages
+
+    def record(self, i):
+        i = int(i)
+        return self.records[i - 1] if 1 <= i <= len(self.records) else None
+
+    def get(self, path):
+        m = self.RECORD.match(path)
+        if m:
+            record = self.record(m[1])
+            return record and (render_record(record).encode("utf-8"), "text/html; charset=utf-8")
+        m = self.PDF.match(path)
+        if m:
+            record = self.record(m[1])
+            return record and (make_pdf(transcript_lines(record, self.pdf_pages)), "application/pdf")
+        m = self.INDEX.match(path)
+        if m:
+            start = (int(m[1] or 1) - 1) * PER_INDEX_PAGE
+            if start >= len(self.records) or (m[1] and int(m[1]) < 2):
+                return None
+            entries = list(enumerate(self.records[start:start + PER_INDEX_PAGE], start=start + 1))
+            return render_index(entries).encode("utf-8"), "text/html; charset=utf-8"
+        return None
+
+
+class RateLimit:
+    # Server-side token bucket; requests beyond it get 429 + Retry-After.
+    def __init__(self, rate):
+        self.rate = rate
+        self.tokens = rate
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def allow(self):
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            return False
+
+
+def make_handler(pages, delay, fault_rate=0.0, rate_limit=None):
+    limiter = RateLimit(rate_limit) if rate_limit else None
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if limiter and not limiter.allow():
+                self.send_response(429)
+                self.send_header("Retry-After", "1")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            if fault_rate and random.random() < fault_rate:
+                self.send_error(503)
+                return
+            if delay:
+                time.sleep(delay)
+            page = pages.get(self.path.rstrip("/"))
+            if page is None:
+                self.send_error(404)
+                return
+            data, content_type = page
+            etag = '"' + hashlib.sha1(data).hexdigest() + '"'
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def make_server(records, host="127.0.0.1", port=0, delay=0.0, fault_rate=0.0, rate_limit=None,
+                lazy=False):
+    pages = LazyPages(records) if lazy else build_pages(records)
+    handler = make_handler(pages, delay, fault_rate, rate_limit)
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve record pages locally")
+    parser.add_argument("--data", default="data.json")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--delay", type=float, default=0.0,
+                        help="seconds of simulated latency per request")
+    parser.add_argument("--fault-rate", type=float, default=0.0,
+                        help="fraction of requests answered with 503")
+    parser.add_argument("--rate-limit", type=float, default=None,
+                        help="requests per second before answering 429")
+    args = parser.parse_args()
+
+    records = load_records(args.data)
+    server = make_server(records, args.host, args.port, args.delay, args.fault_rate,
+                         args.rate_limit)
+    host, port = server.server_address
+    print(f"Serving {len(records)} records at http://{host}:{port}/trans/")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
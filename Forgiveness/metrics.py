@@ -0,0 +1,142 @@
+import json
+import os
+import resource
+import time
+from contextlib import contextmanager
+
+# Lightweight per-stage instrumentation for the Forgiveness scripts.
+#
+#   metrics = Metrics("scraper")
+#   with metrics.stage("fetch") as fetch:
+#       with fetch.item() as item:
+#           ...
+#           item.bytes_in += len(body)
+#   metrics.write("run.json")      # also writes run.prom (OpenMetrics text)
+#
+# Each stage records wall time, CPU time (this process plus any finished
+# child processes), item count, bytes in/out and p50/p95 item latency.
+
+
+def _cpu():
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime
+
+
+def percentile(values, p):
+    if not values:
+        return None
+    ordered = sorted(values)
+    k = min(len(ordered) - 1, max(0, round(p / 100 * (len(ordered) - 1))))
+    return round(ordered[k], 6)
+
+
+class Item:
+    def __init__(self):
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+
+class Stage:
+    def __init__(self, name):
+        self.name = name
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.items = 0
+        self.errors = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.latencies = []
+
+    def record(self, latency=None, bytes_in=0, bytes_out=0, error=False):
+        # For items timed elsewhere, e.g. inside a worker process.
+        self.items += 1
+        self.errors += bool(error)
+        self.bytes_in += bytes_in
+        self.bytes_out += bytes_out
+        if latency is not None:
+            self.latencies.append(latency)
+
+    @contextmanager
+    def item(self):
+        it = Item()
+        t0 = time.perf_counter()
+        error = False
+        try:
+            yield it
+        except BaseException:
+            error = True
+            raise
+        finally:
+            self.record(time.perf_counter() - t0, it.bytes_in, it.bytes_out, error)
+
+    def summary(self):
+        wall = self.wall or None
+        return {
+            "wall_seconds": round(self.wall, 6),
+            "cpu_seconds": round(self.cpu, 6),
+            "items": self.items,
+            "errors": self.errors,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "items_per_second": round(self.items / wall, 3) if wall else None,
+            "latency_p50_seconds": percentile(self.latencies, 50),
+            "latency_p95_seconds": percentile(self.latencies, 95),
+        }
+
+
+class Metrics:
+    def __init__(self, run):
+        self.run = run
+        self.started = time.time()
+        self.stages = {}
+
+    def get(self, name):
+        # The stage without timing it, for recording items from inside a
+        # stage that the caller times as a whole.
+        return self.stages.setdefault(name, Stage(name))
+
+    @contextmanager
+    def stage(self, name):
+        stage = self.get(name)
+        t0, c0 = time.perf_counter(), _cpu()
+        try:
+            yield stage
+        finally:
+            stage.wall += time.perf_counter() - t0
+            stage.cpu += _cpu() - c0
+
+    def as_dict(self):
+        return {
+            "run": self.run,
+            "started": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(self.started)),
+            "stages": {name: s.summary() for name, s in self.stages.items()},
+        }
+
+    def openmetrics(self):
+        fields = [
+            ("wall_seconds", "gauge"),
+            ("cpu_seconds", "gauge"),
+            ("items", "gauge"),
+            ("errors", "gauge"),
+            ("bytes_in", "gauge"),
+            ("bytes_out", "gauge"),
+            ("latency_p50_seconds", "gauge"),
+            ("latency_p95_seconds", "gauge"),
+        ]
+        lines = []
+        for field, kind in fields:
+            metric = f"forgiveness_stage_{field}"
+            lines.append(f"# TYPE {metric} {kind}")
+            for name, s in self.stages.items():
+                value = s.summary()[field]
+                if value is not None:
+                    lines.append(f'{metric}{{run="{self.run}",stage="{name}"}} {value}')
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path):
+        with open(path, "w") as f:
+            json.dump(self.as_dict(), f, indent=2)
+        with open(os.path.splitext(path)[0] + ".prom", "w") as f:
+            f.write(self.openmetrics())
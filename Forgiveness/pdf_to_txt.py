@@ -1,12 +1,370 @@
+import argparse
+import json
+import os
+import signal
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, as_completed, wait
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
+
+from pdfminer.converter import TextConverter
 from pdfminer.high_level import extract_text
+from pdfminer.layout import LAParams
+from pdfminer.pdfinterp import PDFPageInterpreter, PDFResourceManager
+from pdfminer.pdfpage import PDFPage
+
+from metrics import Metrics
+from store import TranscriptStore, sha256_file
+from zstd_text import Compressor
+
+
+class ExtractTimeout(Exception):
+    pass
+
+
+def _on_alarm(signum, frame):
+    raise ExtractTimeout()
+
+
+WRITE_BUFFER = 256 * 1024
+
+
+def page_index_path(txt_file):
+    return Path(txt_file).with_suffix(".pages.json")
+
+
+def extract_streaming(pdf_file, out_file, index_file=None):
+    # Same pipeline as pdfminer's extract_text, but the converter writes
+    # each page straight into a buffered file instead of one big string,
+    # so memory is bounded by the largest page rather than the transcript.
+    offsets = []
+    with open(pdf_file, "rb") as fp, open(out_file, "wb", buffering=WRITE_BUFFER) as out:
+        rsrcmgr = PDFResourceManager(caching=True)
+        device = TextConverter(rsrcmgr, out, codec="utf-8", laparams=LAParams())
+        interpreter = PDFPageInterpreter(rsrcmgr, device)
+        for page in PDFPage.get_pages(fp, caching=True):
+            offsets.append(out.tell())
+            interpreter.process_page(page)
+        offsets.append(out.tell())
+
+    if index_file:
+        with open(index_file, "w") as f:
+            json.dump(offsets, f)
+    return len(offsets) - 1
+
+
+def rebuild_page_index(txt_file):
+    # The same offsets extract_streaming records, recovered from the text:
+    # every page ends with a form feed, so pages start at 0 and after each
+    # one. Used when the text came from somewhere other than an extraction.
+    with open(txt_file, "rb") as f:
+        data = f.read()
+    offsets = [0]
+    pos = data.find(b"\f")
+    while pos >= 0:
+        offsets.append(pos + 1)
+        pos = data.find(b"\f", pos + 1)
+    if offsets[-1] != len(data):
+        offsets.append(len(data))
+    with open(page_index_path(txt_file), "w") as f:
+        json.dump(offsets, f)
+    return len(offsets) - 1
+
+
+def read_page(txt_file, n):
+    # Uses the .pages.json index written by --page-index to read page n
+    # (zero-based) without scanning the rest of the transcript.
+    with open(page_index_path(txt_file)) as f:
+        offsets = json.load(f)
+    with open(txt_file, "rb") as f:
+        f.seek(offsets[n])
+        return f.read(offsets[n + 1] - offsets[n]).decode("utf-8")
+
+
+def extract_to_file(pdf_file, tmp_file, timeout=None, stream=False, page_index=False):
+    # Runs in a worker process (or inline for the serial path). Errors are
+    # returned rather than raised so one bad PDF only fails itself.
+    if timeout:
+        signal.signal(signal.SIGALRM, _on_alarm)
+        signal.alarm(timeout)
+    try:
+        if stream or page_index:
+            index_file = page_index_path(tmp_file.with_suffix("")) if page_index else None
+            return extract_streaming(pdf_file, tmp_file, index_file), None
+        text = extract_text(pdf_file)
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            f.write(text)
+        # TextConverter ends every page with a form feed.
+        return text.count("\f"), None
+    except ExtractTimeout:
+        return 0, f"timed out after {timeout}s"
+    except Exception as e:
+        return 0, repr(e)
+    finally:
+        if timeout:
+            signal.alarm(0)
+
+
+def timed_extract(pdf_file, tmp_file, timeout=None, stream=False, page_index=False):
+    # Timed inside the worker so queueing in the pool isn't counted.
+    t0 = time.perf_counter()
+    result = extract_to_file(pdf_file, tmp_file, timeout, stream, page_index)
+    return result, time.perf_counter() - t0
+
+
+def run_serial(jobs, timeout, stream, page_index):
+    for pdf_file, tmp_file in jobs:
+        yield (pdf_file, tmp_file,
+               *timed_extract(pdf_file, tmp_file, timeout, stream, page_index))
+
+
+def run_parallel(jobs, timeout, stream, page_index, workers):
+    unfinished = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(timed_extract, pdf_file, tmp_file, timeout, stream, page_index):
+                   (pdf_file, tmp_file)
+                   for pdf_file, tmp_file in jobs}
+        for future in as_completed(futures):
+            pdf_file, tmp_file = futures[future]
+            try:
+                result, elapsed = future.result()
+            except BrokenProcessPool:
+                # A worker died outright (e.g. a crash inside a C extension)
+                # and took every job still pending with it. There's no
+                # telling which one did it, so they all get another go.
+                unfinished.append((pdf_file, tmp_file))
+                continue
+            yield pdf_file, tmp_file, result, elapsed
+    if unfinished:
+        yield from run_isolated(unfinished, timeout, stream, page_index, workers)
+
+
+def run_isolated(jobs, timeout, stream, page_index, workers):
+    # One single-worker pool per job, up to `workers` at a time, so a PDF
+    # that crashes its worker again only fails itself.
+    pending = iter(jobs)
+    running = {}
+
+    def start():
+        for pdf_file, tmp_file in pending:
+            pool = ProcessPoolExecutor(max_workers=1)
+            future = pool.submit(timed_extract, pdf_file, tmp_file, timeout, stream, page_index)
+            running[future] = (pdf_file, tmp_file, pool)
+            return
+
+    for _ in range(workers):
+        start()
+    while running:
+        finished, _ = wait(running, return_when=FIRST_COMPLETED)
+        for future in finished:
+            pdf_file, tmp_file, pool = running.pop(future)
+            pool.shutdown()
+            try:
+                result, elapsed = future.result()
+            except BrokenProcessPool as e:
+                result, elapsed = (0, f"worker crashed twice: {e!r}"), None
+            yield pdf_file, tmp_file, result, elapsed
+            start()
+
+
+def load_state(path):
+    if path.exists():
+        with open(path) as f:
+            return json.load(f)
+    return {}
+
+
+def save_state(state, path):
+    tmp = path.with_suffix(".tmp")
+    with open(tmp, "w") as f:
+        json.dump(state, f, indent=1, sort_keys=True)
+    tmp.replace(path)
+
+
+def file_state(pdf_file, stat, digest=None):
+    return {
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "sha256": digest or sha256_file(pdf_file),
+    }
+
+
+def is_unchanged(entry, pdf_file, stat):
+    # Size and mtime are enough to skip a file without reading it; the hash
+    # only gets checked when the file was touched, so a copy or re-download
+    # of identical bytes is still recognised.
+    if entry["size"] != stat.st_size:
+        return False
+    if entry["mtime_ns"] == stat.st_mtime_ns:
+        return True
+    if entry["sha256"] == sha256_file(pdf_file):
+        entry["mtime_ns"] = stat.st_mtime_ns
+        return True
+    return False
+
+
+def output_path(output_dir, stem, compressed=False):
+    return output_dir / (stem + (".txt.zst" if compressed else ".txt"))
+
+
+def remove_orphans(state, present, output_dir):
+    removed = 0
+    for name in list(state):
+        if name in present:
+            continue
+        output_file = output_path(output_dir, Path(name).stem)
+        for path in (output_file, output_path(output_dir, Path(name).stem, True),
+                     page_index_path(output_file)):
+            if path.exists():
+                path.unlink()
+        del state[name]
+        removed += 1
+    return removed
+
+
+def convert(pdf_dir, output_dir, store=None, workers=1, timeout=None, state=None,
+            stream=False, page_index=False, metrics=None, compress=False):
+    metrics = metrics or Metrics("pdf_to_txt")
+    output_dir.mkdir(exist_ok=True)
+
+    jobs = []
+    sources = {}
+    stats = {}
+    present = set()
+    skipped = 0
+    scan = metrics.get("scan")
+    scan_t0 = time.perf_counter()
+    for pdf_file in pdf_dir.glob("*.pdf"):
+        scan.record()
+        output_file = output_path(output_dir, pdf_file.stem, compress)
+
+        if state is not None:
+            present.add(pdf_file.name)
+            stats[pdf_file] = pdf_file.stat()
+            entry = state.get(pdf_file.name)
+            if entry and output_file.exists() and is_unchanged(entry, pdf_file, stats[pdf_file]):
+                if page_index and not page_index_path(output_file).exists():
+                    rebuild_page_index(output_file)
+                skipped += 1
+                continue
+
+        if store:
+            # The text is keyed on the PDF's hash, so it is only extracted
+            # again when the PDF content itself changes. The hash is taken
+            # from the file on disk: the manifest's pdf entry goes stale if
+            # the PDF is replaced outside the store.
+            key = pdf_file.stem
+            pdf_hash = sha256_file(pdf_file)
+            txt_entry = store.get(key, "txt")
+            if txt_entry and txt_entry.get("source") == pdf_hash and store.has(key, "txt"):
+                store.checkout(key, "txt", output_file, link=False)
+                # The store keeps text only, not the page index.
+                if page_index:
+                    rebuild_page_index(output_file)
+                skipped += 1
+                continue
+            sources[pdf_file] = pdf_hash
+
+        # Write beside and rename, so a txt/ file left as a hard link into
+        # the store by an older run is replaced rather than overwritten.
+        jobs.append((pdf_file, output_path(output_dir, pdf_file.stem).with_suffix(".txt.tmp")))
+    scan.wall += time.perf_counter() - scan_t0
+
+    if workers > 1:
+        results = run_parallel(jobs, timeout, stream, page_index, workers)
+    else:
+        results = run_serial(jobs, timeout, stream, page_index)
+
+    compressor = Compressor(output_dir) if compress else None
+    done = pages = 0
+    failed = []
+    with metrics.stage("extract") as extract:
+        for pdf_file, tmp_file, (page_count, error), elapsed in results:
+            extract.record(elapsed, pdf_file.stat().st_size,
+                           tmp_file.stat().st_size if tmp_file.exists() else 0, bool(error))
+            if error:
+                failed.append((pdf_file, error))
+                if tmp_file.exists():
+                    tmp_file.unlink()
+                continue
+
+            output_file = output_path(output_dir, pdf_file.stem, compress)
+            if store:
+                store.add_file(pdf_file.stem, "txt", str(tmp_file), source=sources[pdf_file])
+                store.checkout(pdf_file.stem, "txt", output_file, link=False)
+            elif compressor:
+                compressor.put(tmp_file, output_file)
+            else:
+                tmp_file.replace(output_file)
+            if state is not None:
+                state[pdf_file.name] = file_state(pdf_file, stats[pdf_file], sources.get(pdf_file))
+            done += 1
+            pages += page_count
+        if compressor:
+            compressor.flush()
+
+    removed = remove_orphans(state, present, output_dir) if state is not None else 0
+
+    return done, pages, skipped, removed, failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Extract text from transcript PDFs")
+    parser.add_argument("--pdf-dir", default="./transcripts")
+    parser.add_argument("--out", default=None, help="defaults to ../txt next to the PDFs")
+    parser.add_argument("--store", default=None,
+                        help="content-addressed store directory; skips PDFs already extracted")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="extraction processes; 0 uses every CPU")
+    parser.add_argument("--timeout", type=int, default=None,
+                        help="per-file extraction timeout in seconds")
+    parser.add_argument("--incremental", action="store_true",
+                        help="only extract new or changed PDFs and drop orphaned outputs")
+    parser.add_argument("--state", default=None,
+                        help="incremental state file; defaults to .state.json in the output dir")
+    parser.add_argument("--stream", action="store_true",
+                        help="write text page by page instead of building it in memory")
+    parser.add_argument("--page-index", action="store_true",
+                        help="also write <name>.pages.json with per-page byte offsets (implies --stream)")
+    parser.add_argument("--zstd", action="store_true",
+                        help="store each transcript as <name>.txt.zst, compressed with a "
+                             "dictionary trained on the first transcripts extracted")
+    parser.add_argument("--metrics", default=None, metavar="PATH",
+                        help="write per-stage timings as JSON (and OpenMetrics text "
+                             "alongside as .prom)")
+    args = parser.parse_args()
+    if args.zstd and (args.store or args.page_index):
+        parser.error("--zstd cannot be combined with --store or --page-index")
+
+    pdf_dir = Path(args.pdf_dir)
+    output_dir = Path(args.out) if args.out else pdf_dir / "../txt"
+    store = TranscriptStore(args.store) if args.store else None
+    workers = args.workers or os.cpu_count()
+    state_path = Path(args.state) if args.state else output_dir / ".state.json"
+    state = load_state(state_path) if args.incremental else None
+
+    metrics = Metrics("pdf_to_txt")
+    t0 = time.perf_counter()
+    done, pages, skipped, removed, failed = convert(pdf_dir, output_dir, store, workers,
+                                                    args.timeout, state, args.stream,
+                                                    args.page_index, metrics, args.zstd)
+    elapsed = time.perf_counter() - t0
+
+    if store:
+        store.save()
+    if state is not None:
+        save_state(state, state_path)
+
+    for pdf_file, error in failed:
+        print(f"Failed to extract {pdf_file}: {error}")
+    print(f"{done} extracted, {skipped} up to date, {removed} orphans removed, "
+          f"{len(failed)} failed")
+    print(f"{elapsed:.2f}s: {done / elapsed:.1f} files/sec, {pages / elapsed:.1f} pages/sec "
+          f"({workers} worker{'s' if workers != 1 else ''})")
+
+    if args.metrics:
+        metrics.write(args.metrics)
 
-pdf_dir = Path("./transcripts")
-output_dir = pdf_dir / "../txt"
-output_dir.mkdir(exist_ok=True)
 
-for pdf_file in pdf_dir.glob("*.pdf"):
-    text = extract_text(pdf_file)
-    output_file = output_dir / (pdf_file.stem + ".txt")
-    with open(output_file, "w", encoding="utf-8") as f:
-        f.write(text)
+if __name__ == "__main__":
+    main()
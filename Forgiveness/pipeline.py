@@ -0,0 +1,238 @@
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from store import sha256_file
+
+# Runs the Forgiveness data flow as a DAG:
+#
+#   scrape -> normalize -> cube / records_db / parquet / applicants --\
+#                      \                                               reconcile
+#   download -> extract -> search_index / corpus -> turns ------------/
+#
+# Every stage declares the files/directories it reads and writes. A stage
+# is skipped when the fingerprint of its inputs (plus its command line)
+# matches the last successful run and its outputs still exist. Stages
+# whose dependencies are done run concurrently.
+#
+# --record DIR / --replay DIR pass an HTTP archive to the network stages
+# (DIR/scrape.warc, DIR/download.warc; one file each since the two stages
+# run at the same time), so a recorded run can be repeated offline.
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+STATE_FILE = ".pipeline_state.json"
+
+
+class Stage:
+    def __init__(self, name, args, inputs=(), outputs=(), network=False):
+        self.name = name
+        self.args = args
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        # Network stages have no local inputs to compare against, so they
+        # only run when their outputs are missing or a refresh is asked for.
+        self.network = network
+        self.deps = set()
+
+    def command(self):
+        return [sys.executable, os.path.join(HERE, self.args[0])] + self.args[1:]
+
+
+def archive_args(name, record=None, replay=None):
+    if record:
+        return ["--record", os.path.join(record, name + ".warc")]
+    if replay:
+        return ["--replay", os.path.join(replay, name + ".warc")]
+    return []
+
+
+def build_stages(base, jobs, record=None, replay=None):
+    stages = [
+        Stage("scrape", ["scraper.py", "--async", "--base", base, "--out", "data1.json",
+                         "--cache", "scrape_cache.json"] + archive_args("scrape", record, replay),
+              outputs=["data1.json"], network=True),
+        Stage("normalize", ["add_filenames.py", "--data", "data1.json", "--out", "data.json"],
+              inputs=["data1.json"], outputs=["data.json"]),
+        Stage("download", ["downloader.py", "--base", base, "--out", "transcripts",
+                           "--store", "store"] + archive_args("download", record, replay),
+              outputs=["transcripts"], network=True),
+        Stage("extract", ["pdf_to_txt.py", "--pdf-dir", "transcripts", "--out", "txt",
+                          "--incremental", "--workers", str(jobs)],
+              inputs=["transcripts"], outputs=["txt"]),
+        Stage("parquet", ["dataset.py", "--data", "data.json", "--out", "data.parquet"],
+              inputs=["data.json"], outputs=["data.parquet"]),
+        Stage("records_db", ["records_db.py", "--db", "records.db", "load", "--data", "data.json"],
+              inputs=["data.json"], outputs=["records.db"]),
+        Stage("cube", ["cube.py", "--data", "data.json", "--out", "cube.json"],
+              inputs=["data.json"], outputs=["cube.json", "cube.records.json"]),
+        Stage("applicants", ["applicants.py", "--data", "data.json", "--out", "applicants.parquet"],
+              inputs=["data.json"], outputs=["applicants.parquet"]),
+        Stage("search_index", ["search_index.py", "--txt", "txt", "--index", "search.idx", "build"],
+              inputs=["txt"], outputs=["search.idx"]),
+        Stage("corpus", ["corpus.py", "--corpus", "corpus.bin", "pack", "--txt", "txt"],
+              inputs=["txt"], outputs=["corpus.bin", "corpus.bin.idx"]),
+        Stage("turns", ["transcript_turns.py", "--corpus", "corpus.bin", "--turns", "turns.parquet",
+                        "--hearings", "hearings.parquet", "--workers", str(jobs)],
+              inputs=["corpus.bin", "corpus.bin.idx"], outputs=["turns.parquet", "hearings.parquet"]),
+        Stage("reconcile", ["clean_data.py", "--data", "data.json", "--txt", "txt",
+                            "--pdf", "transcripts", "--out", "reconcile.json"],
+              inputs=["data.json", "txt", "transcripts"], outputs=["reconcile.json"]),
+    ]
+
+    producers = {out: s.name for s in stages for out in s.outputs}
+    for s in stages:
+        s.deps = {producers[i] for i in s.inputs if i in producers}
+    return {s.name: s for s in stages}
+
+
+def fingerprint(paths):
+    # Files are hashed by content, so a re-scrape that returns the same
+    # records doesn't cascade. Directories use name + size + mtime of each
+    # entry (one level, which is how the pipeline lays them out), skipping
+    # dotfiles such as txt/.state.json that only record bookkeeping.
+    h = hashlib.sha256()
+    for path in paths:
+        h.update(path.encode())
+        if os.path.isdir(path):
+            with os.scandir(path) as it:
+                entries = sorted((e.name, e.stat()) for e in it
+                                 if e.is_file() and not e.name.startswith("."))
+            for name, st in entries:
+                h.update(f"{name}\0{st.st_size}\0{st.st_mtime_ns}\n".encode())
+        elif os.path.exists(path):
+            h.update(sha256_file(path).encode())
+        else:
+            h.update(b"missing\n")
+    return h.hexdigest()
+
+
+def load_state():
+    if os.path.exists(STATE_FILE):
+        with open(STATE_FILE) as f:
+            return json.load(f)
+    return {}
+
+
+def save_state(state):
+    with open(STATE_FILE + ".tmp", "w") as f:
+        json.dump(state, f, indent=1, sort_keys=True)
+    os.replace(STATE_FILE + ".tmp", STATE_FILE)
+
+
+def needs_run(stage, state, force, refresh):
+    if stage.name in force:
+        return True
+    if not all(os.path.exists(o) for o in stage.outputs):
+        return True
+    if stage.network:
+        return refresh
+    prev = state.get(stage.name)
+    return prev is None or prev != stage_key(stage)
+
+
+def stage_key(stage):
+    return fingerprint(stage.inputs) + ":" + " ".join(stage.args)
+
+
+def select(stages, targets):
+    # Targets plus everything upstream of them.
+    wanted = set()
+    todo = list(targets or stages)
+    while todo:
+        name = todo.pop()
+        if name in wanted:
+            continue
+        if name not in stages:
+            raise SystemExit(f"unknown stage: {name}")
+        wanted.add(name)
+        todo.extend(stages[name].deps)
+    return wanted
+
+
+def run_stage(stage, dry_run):
+    if dry_run:
+        return 0, 0.0
+    t0 = time.perf_counter()
+    rc = subprocess.call(stage.command())
+    return rc, time.perf_counter() - t0
+
+
+def run(stages, wanted, jobs, force, refresh, dry_run):
+    state = load_state()
+    done, failed, skipped = set(), set(), set()
+    running = {}
+
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        while True:
+            for name in sorted(wanted - done - failed - skipped - set(running.values())):
+                stage = stages[name]
+                deps = stage.deps & wanted
+                if deps & (failed | skipped):
+                    print(f"[{name}] skipped: upstream failed")
+                    skipped.add(name)
+                    continue
+                if not deps <= done:
+                    continue
+                # Decide only once dependencies have finished, since they
+                # may just have rewritten this stage's inputs.
+                if not needs_run(stage, state, force, refresh):
+                    print(f"[{name}] up to date")
+                    done.add(name)
+                    continue
+                print(f"[{name}] {' '.join(stage.args)}")
+                running[pool.submit(run_stage, stage, dry_run)] = name
+
+            if not running:
+                if wanted - done - failed - skipped:
+                    continue
+                break
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                name = running.pop(future)
+                rc, elapsed = future.result()
+                if rc == 0:
+                    done.add(name)
+                    if not dry_run:
+                        state[name] = stage_key(stages[name])
+                        save_state(state)
+                    print(f"[{name}] done in {elapsed:.1f}s")
+                else:
+                    failed.add(name)
+                    print(f"[{name}] failed with exit code {rc}")
+
+    return not failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the Forgiveness data pipeline")
+    parser.add_argument("targets", nargs="*", help="stages to bring up to date (default: all)")
+    parser.add_argument("--workdir", default=HERE, help="directory holding data and outputs")
+    parser.add_argument("--base", default="https://ir.lawnet.fordham.edu/trans/")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count(),
+                        help="stages to run at once; also passed to extraction")
+    parser.add_argument("--refresh", action="store_true",
+                        help="re-run network stages (scrape, download) even if outputs exist")
+    parser.add_argument("--force", action="append", default=[], metavar="STAGE")
+    parser.add_argument("--dry-run", action="store_true")
+    archive_mode = parser.add_mutually_exclusive_group()
+    archive_mode.add_argument("--record", default=None, metavar="DIR",
+                              help="record the network stages' responses into DIR")
+    archive_mode.add_argument("--replay", default=None, metavar="DIR",
+                              help="run the network stages from archives recorded into DIR")
+    args = parser.parse_args()
+
+    os.chdir(args.workdir)
+    stages = build_stages(args.base, args.jobs, args.record, args.replay)
+    wanted = select(stages, args.targets)
+    ok = run(stages, wanted, args.jobs, set(args.force), args.refresh, args.dry_run)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
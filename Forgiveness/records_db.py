@@ -0,0 +1,162 @@
+import argparse
+import json
+import sqlite3
+import time
+
+# Local SQLite copy of data.json with the usual filter columns indexed, so
+# slide-prep questions are a GROUP BY instead of a pandas re-parse.
+
+COLUMNS = {
+    "Issuing Body": "issuing_body",
+    "Parole Applicant Code": "applicant_code",
+    "Sex": "sex",
+    "Birth Year": "birth_year",
+    "Race/Ethnicity": "race",
+    "Controlling Conviction": "conviction",
+    "Aggregate Minimum Sentence": "min_sentence",
+    "Aggregate Maximum Sentence": "max_sentence",
+    "Facility": "facility",
+    "Interview/Decision Date": "date",
+    "Interview Type": "interview_type",
+    "Form of Interview": "interview_form",
+    "Decision": "decision",
+    "Grounds for Denial": "denial_grounds",
+    "Hold Time/Duration": "hold_time",
+    "Document Type": "document_type",
+    "Collection": "collection",
+    "Recommended Citation": "citation",
+    "Commissioners' Location": "commissioners_location",
+    "Dissenting Commissioner": "dissenting_commissioner",
+    "Dissenting Vote": "dissenting_vote",
+    "Comments": "comments",
+    "Filename": "filename",
+}
+
+INDEXED = ["race", "decision", "facility", "interview_type", "date", "year", "applicant_code"]
+
+GROUPABLE = set(COLUMNS.values()) | {"year"}
+
+GRANTED = "Parole Granted"
+DENIED = "Parole Denied"
+
+SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS records ("
+    + ", ".join(f"{col} {'INTEGER' if col == 'birth_year' else 'TEXT'}" for col in COLUMNS.values())
+    + ", year INTEGER GENERATED ALWAYS AS (CAST(substr(date, 1, 4) AS INTEGER)) STORED)"
+)
+
+
+def connect(path="records.db"):
+    conn = sqlite3.connect(path)
+    conn.execute(SCHEMA)
+    return conn
+
+
+def iter_rows(json_path):
+    with open(json_path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            birth_year = record.get("Birth Year")
+            if birth_year is not None:
+                record["Birth Year"] = int(birth_year)
+            yield tuple(record.get(key) for key in COLUMNS)
+
+
+def load(json_path, db_path="records.db"):
+    conn = connect(db_path)
+    with conn:
+        # Rebuild from scratch; indexes go on after the bulk insert, which
+        # is much cheaper than maintaining them row by row.
+        conn.execute("DROP TABLE IF EXISTS records")
+        conn.execute(SCHEMA)
+        placeholders = ", ".join("?" for _ in COLUMNS)
+        conn.executemany(
+            f"INSERT INTO records ({', '.join(COLUMNS.values())}) VALUES ({placeholders})",
+            iter_rows(json_path),
+        )
+        for col in INDEXED:
+            conn.execute(f"CREATE INDEX IF NOT EXISTS idx_records_{col} ON records ({col})")
+    conn.execute("ANALYZE")
+    return conn
+
+
+def _check(columns):
+    for col in columns:
+        if col not in GROUPABLE:
+            raise ValueError(f"unknown column: {col}")
+
+
+def _where(filters):
+    _check(filters)
+    clauses = []
+    params = []
+    for col, value in filters.items():
+        if isinstance(value, tuple):
+            clauses.append(f"{col} BETWEEN ? AND ?")
+            params.extend(value)
+        else:
+            clauses.append(f"{col} = ?")
+            params.append(value)
+    return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+
+def count_by(conn, *by, **filters):
+    # count_by(conn, "facility", decision="Parole Denied", year=(2010, 2015))
+    _check(by)
+    where, params = _where(filters)
+    cols = ", ".join(by)
+    sql = f"SELECT {cols + ', ' if cols else ''}COUNT(*) FROM records{where}"
+    if by:
+        sql += f" GROUP BY {cols} ORDER BY {cols}"
+    return conn.execute(sql, params).fetchall()
+
+
+def release_rate(conn, by=("race", "year"), **filters):
+    # Share of decided hearings (granted or denied) that ended in release.
+    _check(by)
+    where, params = _where(filters)
+    decided = "decision IN (?, ?)"
+    where = (where + " AND " + decided) if where else " WHERE " + decided
+    params += [GRANTED, DENIED]
+    cols = ", ".join(by)
+    sql = (
+        f"SELECT {cols + ', ' if cols else ''}COUNT(*) AS hearings, "
+        f"SUM(decision = ?) AS granted, "
+        f"ROUND(1.0 * SUM(decision = ?) / COUNT(*), 4) AS rate "
+        f"FROM records{where}"
+    )
+    if by:
+        sql += f" GROUP BY {cols} ORDER BY {cols}"
+    return conn.execute(sql, [GRANTED, GRANTED] + params).fetchall()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load parole records into SQLite and query them")
+    parser.add_argument("--db", default="records.db")
+    sub = parser.add_subparsers(dest="command", required=True)
+    load_cmd = sub.add_parser("load")
+    load_cmd.add_argument("--data", default="data.json")
+    rate_cmd = sub.add_parser("release-rate")
+    rate_cmd.add_argument("--by", default="race,year")
+    count_cmd = sub.add_parser("count")
+    count_cmd.add_argument("--by", default="decision")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    if args.command == "load":
+        conn = load(args.data, args.db)
+        n = conn.execute("SELECT COUNT(*) FROM records").fetchone()[0]
+        print(f"{n} records loaded into {args.db}")
+    else:
+        conn = connect(args.db)
+        by = tuple(c for c in args.by.split(",") if c)
+        rows = release_rate(conn, by) if args.command == "release-rate" else count_by(conn, *by)
+        for row in rows:
+            print("\t".join("" if v is None else str(v) for v in row))
+    print(f"{(time.perf_counter() - t0) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,31 +1,231 @@
-import requests
-from bs4 import BeautifulSoup
-import json
+import argparse
+import asyncio
+import os
+import time
+
+import aiohttp
+
+import html_parsers
+import jsonl
+from fetcher import Fetcher, FetchError, SyncFetcher, load_failed, save_failed
+from http_archive import open_archive
+from http_cache import ResponseCache
+from metrics import Metrics
 
 base = "https://ir.lawnet.fordham.edu/trans/"
 
-tot_map = {}
 
-for i in range(1, 201):
-    url = base + str(i)
+def parse_record(html):
+    return html_parsers.parse_record(html)
+
+
+def scrape(base, start, end, cache=None, metrics=None, sink=None, skip=(), fetcher=None,
+           timeout=30):
+    # Records go to sink(id, record) as soon as they are parsed; without a
+    # sink they are collected and returned. fetcher is a SyncFetcher, so
+    # throttling and errors are retried the same way as in async mode.
+    metrics = metrics or Metrics("scraper")
+    fetcher = fetcher or SyncFetcher()
+    fetch = metrics.get("fetch")
+    tot_map = {}
+    sink = sink or tot_map.__setitem__
+
+    for i in range(start, end + 1):
+        if i in skip:
+            continue
+        url = base + str(i)
+
+        headers = cache.conditional_headers(url) if cache else {}
+        try:
+            with fetch.item() as item:
+                response = fetcher.get(url, context={"id": i}, headers=headers, timeout=timeout)
+                item.bytes_in = len(response.content)
+        except FetchError as e:
+            print(f"Failed to get url: {e}")
+            continue
+
+        if cache and response.status_code == 304:
+            sink(i, cache.hit(url))
+            continue
+
+        if response.status_code != 200:
+            e = fetcher.fail(url, f"HTTP {response.status_code}", {"id": i})
+            print(f"Failed to get url: {e}")
+            continue
+
+        with metrics.stage("parse") as parse, parse.item():
+            ind_map = parse_record(response.text)
+
+        if cache:
+            cache.store(url, response.headers, ind_map)
+        sink(i, ind_map)
+
+    return tot_map
+
+
+async def fetch_record(fetcher, url, timeout, cache=None, record_id=None, metrics=None):
+    metrics = metrics or Metrics("scraper")
+    headers = cache.conditional_headers(url) if cache else {}
+
+    # Latency includes time spent waiting on the rate limiter and retries.
+    with metrics.get("fetch").item() as item:
+        async with fetcher.get(url, context={"id": record_id}, headers=headers,
+                               timeout=timeout) as response:
+            if cache and response.status == 304:
+                return cache.hit(url)
+            if response.status != 200:
+                raise fetcher.fail(url, f"HTTP {response.status}", {"id": record_id})
+            body = await response.read()
+            html = body.decode(response.get_encoding())
+            response_headers = response.headers
+            item.bytes_in = len(body)
+
+    with metrics.stage("parse") as parse, parse.item():
+        ind_map = parse_record(html)
+    if cache:
+        cache.store(url, response_headers, ind_map)
+    return ind_map
+
+
+async def scrape_async(base, ids, concurrency=16, timeout=30, cache=None, rate=20.0, retries=5,
+                       metrics=None, sink=None, archive=None, failed=None):
+    client_timeout = aiohttp.ClientTimeout(total=timeout)
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    tot_map = {}
+    sink = sink or tot_map.__setitem__
+
+    async with aiohttp.ClientSession(connector=connector) as session:
+        fetcher = Fetcher(session, rate=rate, burst=max(1, int(rate)),
+                          concurrency=min(4, concurrency), max_concurrency=concurrency,
+                          retries=retries, archive=archive, failed=failed)
+        # A fixed set of workers pulls ids from one shared iterator, so
+        # memory doesn't grow with the number of pages; the fetcher's
+        # limiter decides how many of them are actually in flight.
+        pending = iter(ids)
+
+        async def worker():
+            for i in pending:
+                url = base + str(i)
+                try:
+                    ind_map = await fetch_record(fetcher, url, client_timeout, cache, i, metrics)
+                except FetchError as e:
+                    # Already in fetcher.failed.
+                    print(f"Failed to get url: {e}")
+                    continue
+                except Exception as e:
+                    e = fetcher.fail(url, repr(e), {"id": i})
+                    print(f"Failed to get url: {e}")
+                    continue
+                if ind_map is not None:
+                    sink(i, ind_map)
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+    return tot_map, fetcher
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scrape parole record metadata")
+    parser.add_argument("--base", default=base)
+    parser.add_argument("--start", type=int, default=1)
+    parser.add_argument("--end", type=int, default=200)
+    parser.add_argument("--out", default="data1.json",
+                        help="JSON lines, one {\"id\": ..., \"record\": {...}} per page, "
+                             "appended as each page is parsed")
+    parser.add_argument("--resume", action="store_true",
+                        help="keep the pages already in --out and only fetch the rest")
+    parser.add_argument("--async", dest="use_async", action="store_true",
+                        help="fetch pages concurrently")
+    parser.add_argument("--concurrency", type=int, default=16,
+                        help="upper bound for the adaptive concurrency (async mode)")
+    parser.add_argument("--rate", type=float, default=20.0,
+                        help="requests per second per host")
+    parser.add_argument("--retries", type=int, default=5)
+    parser.add_argument("--failed", default="failed_urls.json",
+                        help="where URLs that fail (error status, or still failing after "
+                             "retries) are written")
+    parser.add_argument("--retry-failed", default=None, metavar="PATH",
+                        help="only fetch the ids listed in a failed-URL file and append "
+                             "them to --out")
+    parser.add_argument("--timeout", type=float, default=30,
+                        help="per-request timeout in seconds")
+    parser.add_argument("--cache", default=None,
+                        help="path of an on-disk response cache for conditional requests")
+    parser.add_argument("--parser", default="auto", choices=["auto"] + html_parsers.BACKENDS,
+                        help="HTML parsing backend")
+    parser.add_argument("--metrics", default=None, metavar="PATH",
+                        help="write per-stage timings as JSON (and OpenMetrics text "
+                             "alongside as .prom)")
+    archive_mode = parser.add_mutually_exclusive_group()
+    archive_mode.add_argument("--record", default=None, metavar="PATH",
+                              help="append every response to a WARC archive for --replay")
+    archive_mode.add_argument("--replay", default=None, metavar="PATH",
+                              help="serve responses from a recorded archive instead of the network")
+    args = parser.parse_args()
 
-    response = requests.get(url)
+    html_parsers.configure(args.parser)
+    cache = ResponseCache(args.cache) if args.cache else None
+    archive = open_archive(args.record, args.replay)
+    metrics = Metrics("scraper")
 
-    if response.status_code != 200:
-        print("Failed to get url")
+    append = bool(args.resume or args.retry_failed) and os.path.exists(args.out)
+    if append and not jsonl.is_json_lines(args.out):
+        parser.error(f"{args.out} is in the old single-object format; scrape it again")
+    # Opening for append settles a last line left without a newline, so
+    # read what is done only after that.
+    writer = jsonl.RecordWriter(args.out, append=append)
+    done = set()
+    if args.resume and append:
+        done = {r["id"] for r in jsonl.iter_records(args.out)}
 
-    html = response.text
-    soup = BeautifulSoup(html, "html.parser")
+    if args.retry_failed:
+        ids = [entry["id"] for entry in load_failed(args.retry_failed)]
+    else:
+        ids = (i for i in range(args.start, args.end + 1) if i not in done)
 
-    alpha = soup.body.find(id="alpha")
+    def sink(i, ind_map):
+        with metrics.stage("write") as write, write.item():
+            writer.write({"id": i, "record": ind_map})
 
-    ind_map = {}
+    failed = []
+    t0 = time.perf_counter()
+    try:
+        with metrics.stage("fetch") as fetch:
+            # The archive hooks into the async fetcher, so it implies --async.
+            if args.use_async or args.retry_failed or archive:
+                _, fetcher = asyncio.run(scrape_async(args.base, ids, args.concurrency,
+                                                      args.timeout, cache, args.rate,
+                                                      args.retries, metrics, sink, archive,
+                                                      failed))
+            else:
+                fetcher = SyncFetcher(rate=args.rate, retries=args.retries, failed=failed)
+                scrape(args.base, args.start, args.end, cache, metrics, sink, done, fetcher,
+                       args.timeout)
+            print(fetcher.summary())
+    finally:
+        save_failed(failed, args.failed)
+        writer.close()
+        if archive:
+            archive.close()
+        if cache:
+            cache.save()
+    elapsed = time.perf_counter() - t0
+    # Pages are parsed and written as they arrive, inside the fetch loop;
+    # take that time back out so the three stages don't overlap.
+    parse, write = metrics.get("parse"), metrics.get("write")
+    fetch.wall -= parse.wall + write.wall
+    fetch.cpu -= parse.cpu + write.cpu
+    write.bytes_out = os.path.getsize(args.out)
 
-    for h2 in alpha.find_all("h2"):
-        ind_map[h2.string] = h2.next_sibling.next_sibling.string
+    print(f"{writer.count} pages in {elapsed:.2f}s ({writer.count / elapsed:.1f} pages/sec)")
+    if done:
+        print(f"{len(done)} pages already in {args.out}")
+    if cache:
+        print(cache.summary())
 
-    tot_map[i] = ind_map
+    if args.metrics:
+        metrics.write(args.metrics)
 
 
-with open("data.json", "w") as f:
-    json.dump(tot_map, f, indent=4)
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,265 @@
+import argparse
+import json
+import os
+import pickle
+import re
+import time
+from collections import defaultdict
+
+import zstd_text
+
+# Positional inverted index over the extracted transcripts in txt/.
+#
+#   postings[term][filename] -> sorted token positions of term in that file
+#   marks[filename]          -> byte offset of every MARK_EVERY-th token
+#
+# The marks let a snippet read just the few hundred bytes around a hit
+# instead of re-reading and re-tokenizing the whole transcript.
+#
+# Results are joined back to data.json through the Filename column so a
+# hit comes back with its Parole Applicant Code and Interview/Decision Date.
+
+TOKEN = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+NEAR = re.compile(r"^(.+?)\s+NEAR/(\d+)\s+(.+)$")
+MARK_EVERY = 64
+
+
+def tokenize(text):
+    return TOKEN.finditer(text.lower())
+
+
+class SearchIndex:
+    def __init__(self):
+        self.postings = defaultdict(dict)
+        self.doc_terms = {}
+        self.doc_stats = {}
+        self.marks = {}
+
+    @classmethod
+    def load(cls, path):
+        # Stored as plain containers so the file does not depend on the
+        # module the index was built from (__main__ vs search_index).
+        # Indexes written before marks existed load without them.
+        index = cls()
+        with open(path, "rb") as f:
+            postings, index.doc_terms, index.doc_stats, *rest = pickle.load(f)
+        index.postings.update(postings)
+        index.marks = rest[0] if rest else {}
+        return index
+
+    def save(self, path):
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump((dict(self.postings), self.doc_terms, self.doc_stats, self.marks), f,
+                        protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+
+    def add(self, filename, text):
+        self.remove(filename)
+        positions = defaultdict(list)
+        marks = []
+        char = byte = 0
+        for pos, m in enumerate(tokenize(text)):
+            positions[m.group()].append(pos)
+            if pos % MARK_EVERY == 0:
+                byte += len(text[char:m.start()].encode("utf-8"))
+                char = m.start()
+                marks.append(byte)
+        for term, plist in positions.items():
+            self.postings[term][filename] = plist
+        self.doc_terms[filename] = list(positions)
+        self.marks[filename] = marks
+
+    def remove(self, filename):
+        for term in self.doc_terms.pop(filename, ()):
+            docs = self.postings[term]
+            docs.pop(filename, None)
+            if not docs:
+                del self.postings[term]
+        self.doc_stats.pop(filename, None)
+        self.marks.pop(filename, None)
+
+    def update(self, txt_dir):
+        # Re-index only files whose size or mtime changed since last build,
+        # and drop files that are gone.
+        seen = set()
+        added = removed = 0
+        with os.scandir(txt_dir) as it:
+            for entry in it:
+                # Documents are keyed by the .txt name whether the file is
+                # plain or pdf_to_txt.py --zstd output.
+                name = zstd_text.text_name(entry.name)
+                if name is None or not entry.is_file():
+                    continue
+                seen.add(name)
+                st = entry.stat()
+                stats = (st.st_size, st.st_mtime_ns)
+                if self.doc_stats.get(name) == stats:
+                    continue
+                self.add(name, zstd_text.read_text(entry.path))
+                self.doc_stats[name] = stats
+                added += 1
+        for filename in list(self.doc_terms):
+            if filename not in seen:
+                self.remove(filename)
+                removed += 1
+        return added, removed
+
+    def term_docs(self, term):
+        return self.postings.get(term, {})
+
+    def phrase(self, terms):
+        # Documents where terms occur at consecutive positions; returns the
+        # position of the first term of each match.
+        if not terms:
+            return {}
+        first = self.term_docs(terms[0])
+        candidates = set(first)
+        for term in terms[1:]:
+            candidates &= set(self.term_docs(term))
+        hits = {}
+        for doc in candidates:
+            starts = set(first[doc])
+            for offset, term in enumerate(terms[1:], start=1):
+                starts &= {p - offset for p in self.postings[term][doc]}
+                if not starts:
+                    break
+            if starts:
+                hits[doc] = sorted(starts)
+        return hits
+
+    def near(self, left, right, distance):
+        # Documents where the two phrases start within distance tokens of
+        # each other, in either order.
+        a = self.phrase(left)
+        b = self.phrase(right)
+        hits = {}
+        for doc in set(a) & set(b):
+            bs = b[doc]
+            matches = []
+            j = 0
+            for p in a[doc]:
+                while j < len(bs) and bs[j] < p - distance:
+                    j += 1
+                if j < len(bs) and bs[j] <= p + distance:
+                    matches.append(p)
+            if matches:
+                hits[doc] = matches
+        return hits
+
+    def query(self, q):
+        m = NEAR.match(q.strip())
+        if m:
+            left = [t.group() for t in tokenize(m.group(1).strip('"'))]
+            right = [t.group() for t in tokenize(m.group(3).strip('"'))]
+            return self.near(left, right, int(m.group(2)))
+
+        q = q.strip()
+        if len(q) > 1 and q[0] == q[-1] == '"':
+            return self.phrase([t.group() for t in tokenize(q[1:-1])])
+
+        # Bare terms are ANDed together.
+        terms = [t.group() for t in tokenize(q)]
+        if not terms:
+            return {}
+        docs = set(self.term_docs(terms[0]))
+        for term in terms[1:]:
+            docs &= set(self.term_docs(term))
+        return {doc: self.postings[terms[0]][doc] for doc in docs}
+
+
+def load_metadata(path):
+    meta = {}
+    with open(path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if record.get("Filename"):
+                meta[record["Filename"]] = record
+    return meta
+
+
+def read_window(path, start, end):
+    # Bytes [start, end) of a transcript; end None means to the end.
+    path = str(path)
+    if path.endswith(zstd_text.SUFFIX):
+        return zstd_text.read_bytes(path)[start:end]
+    with open(path, "rb") as f:
+        f.seek(start)
+        return f.read() if end is None else f.read(end - start)
+
+
+def snippet(path, position, width=12, marks=None):
+    # With the document's marks, only the stretch between the marks either
+    # side of the hit is read and tokenized.
+    first = max(position - width, 0)
+    if marks:
+        lo_mark = first // MARK_EVERY
+        hi_mark = (position + width) // MARK_EVERY + 1
+        end = marks[hi_mark] if hi_mark < len(marks) else None
+        text = read_window(path, marks[lo_mark], end).decode("utf-8", "replace")
+        offset = lo_mark * MARK_EVERY
+    else:
+        text = zstd_text.read_text(path)
+        offset = 0
+    spans = [m.span() for m in tokenize(text)]
+    lo = spans[first - offset][0]
+    hi = spans[min(position + width - offset, len(spans) - 1)][1]
+    return " ".join(text[lo:hi].split())
+
+
+def search(index, q, txt_dir, meta, limit=20):
+    hits = index.query(q)
+    results = []
+    for filename in sorted(hits)[:limit]:
+        record = meta.get(filename, {})
+        results.append({
+            "Filename": filename,
+            "Parole Applicant Code": record.get("Parole Applicant Code"),
+            "Interview/Decision Date": record.get("Interview/Decision Date"),
+            "matches": len(hits[filename]),
+            "snippet": snippet(zstd_text.text_path(txt_dir, filename), hits[filename][0],
+                               marks=index.marks.get(filename)),
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build and query the transcript search index")
+    parser.add_argument("--txt", default="txt")
+    parser.add_argument("--data", default="data.json")
+    parser.add_argument("--index", default="search.idx")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("build", help="index new or changed transcripts")
+    query = sub.add_parser("query", help='e.g. remorse, "release is incompatible", remorse NEAR/5 victim')
+    query.add_argument("q")
+    query.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    if args.command == "build":
+        index = SearchIndex.load(args.index) if os.path.exists(args.index) else SearchIndex()
+        t0 = time.perf_counter()
+        added, removed = index.update(args.txt)
+        index.save(args.index)
+        print(f"{added} indexed, {removed} removed, {len(index.doc_terms)} documents, "
+              f"{len(index.postings)} terms in {time.perf_counter() - t0:.2f}s")
+        return
+
+    # Loading is reported apart from the query: unpickling the whole index
+    # is most of what one CLI call costs, and it is paid once per process.
+    t0 = time.perf_counter()
+    index = SearchIndex.load(args.index)
+    meta = load_metadata(args.data)
+    loaded = (time.perf_counter() - t0) * 1000
+    t0 = time.perf_counter()
+    results = search(index, args.q, args.txt, meta, args.limit)
+    elapsed = (time.perf_counter() - t0) * 1000
+    for r in results:
+        print(f"{r['Parole Applicant Code']}  {r['Interview/Decision Date']}  "
+              f"({r['matches']})  ...{r['snippet']}...")
+    print(f"{len(results)} results in {elapsed:.1f} ms (index and metadata loaded in {loaded:.1f} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+import hashlib
+import json
+import os
+import shutil
+import time
+
+# Content-addressed store for transcript PDFs and their extracted text.
+#
+#   store/objects/ab/abcdef...   one file per distinct SHA-256
+#   store/manifest.json          "<code>-<date>" -> {"pdf": {...}, "txt": {...}}
+#
+# transcripts/ keeps its usual filenames, but as hard links into objects/,
+# so identical files under different names take the disk once. txt/ gets
+# copies instead: text files are the ones people open and edit, and an edit
+# through a hard link would change the stored object under its hash.
+
+READ_SIZE = 1024 * 1024
+
+
+def sha256_file(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(READ_SIZE), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def link_or_copy(src, dest):
+    if os.path.exists(dest):
+        if os.path.samefile(src, dest):
+            return
+        os.unlink(dest)
+    try:
+        os.link(src, dest)
+    except OSError:
+        shutil.copyfile(src, dest)
+
+
+def copy_file(src, dest):
+    # Copied beside and renamed, so dest is never a half-written file and
+    # an old hard link at dest is replaced rather than written through.
+    tmp = dest + ".tmp"
+    shutil.copyfile(src, tmp)
+    os.replace(tmp, dest)
+
+
+class TranscriptStore:
+    def __init__(self, root="store"):
+        self.root = root
+        self.objects = os.path.join(root, "objects")
+        self.manifest_path = os.path.join(root, "manifest.json")
+        os.makedirs(self.objects, exist_ok=True)
+        self.manifest = {}
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path) as f:
+                self.manifest = json.load(f)
+
+    def object_path(self, digest):
+        return os.path.join(self.objects, digest[:2], digest)
+
+    def get(self, key, kind):
+        return self.manifest.get(key, {}).get(kind)
+
+    def has(self, key, kind):
+        entry = self.get(key, kind)
+        return entry is not None and os.path.exists(self.object_path(entry["sha256"]))
+
+    def add_file(self, key, kind, path, digest=None, **extra):
+        # Moves path into the store; if the content is already there the
+        # new copy is simply dropped.
+        if digest is None:
+            digest = sha256_file(path)
+        size = os.path.getsize(path)
+        obj = self.object_path(digest)
+        if os.path.exists(obj):
+            os.unlink(path)
+        else:
+            os.makedirs(os.path.dirname(obj), exist_ok=True)
+            shutil.move(path, obj)
+        self.manifest.setdefault(key, {})[kind] = {
+            "sha256": digest,
+            "size": size,
+            "fetched_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            **extra,
+        }
+        return digest
+
+    def add_bytes(self, key, kind, data, **extra):
+        digest = hashlib.sha256(data).hexdigest()
+        obj = self.object_path(digest)
+        if not os.path.exists(obj):
+            os.makedirs(os.path.dirname(obj), exist_ok=True)
+            tmp = obj + ".tmp"
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, obj)
+        self.manifest.setdefault(key, {})[kind] = {
+            "sha256": digest,
+            "size": len(data),
+            "fetched_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            **extra,
+        }
+        return digest
+
+    def checkout(self, key, kind, dest, link=True):
+        src = self.object_path(self.get(key, kind)["sha256"])
+        if link:
+            link_or_copy(src, dest)
+        else:
+            copy_file(src, os.fspath(dest))
+
+    def save(self):
+        tmp = self.manifest_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.manifest, f, indent=1, sort_keys=True)
+        os.replace(tmp, self.manifest_path)
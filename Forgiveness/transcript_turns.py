@@ -0,0 +1,175 @@
+import argparse
+import io
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+import zstd_text
+from corpus import Corpus
+
+# Splits extracted transcripts into speaker turns and writes two columnar
+# tables keyed by Filename:
+#
+#   turns.parquet     one row per turn: speaker label, role, chars, words
+#   hearings.parquet  one row per transcript: per-role totals and length
+#
+# Each file is read line by line and only counts are kept, so a worker's
+# memory does not grow with transcript length.
+
+SPEAKER = re.compile(r"^\s*([A-Z][A-Z.'\- ]{1,40}?)\s*:\s?(.*)$")
+
+COMMISSIONER = re.compile(r"COMMISSIONER|CHAIR|BOARD MEMBER|PRESIDING")
+APPLICANT = re.compile(r"INMATE|APPLICANT|INCARCERATED|PAROLEE")
+
+ROLES = ("commissioner", "applicant", "other")
+
+TURN_SCHEMA = pa.schema([
+    ("Filename", pa.string()),
+    ("turn", pa.int32()),
+    ("speaker", pa.string()),
+    ("role", pa.dictionary(pa.int8(), pa.string())),
+    ("chars", pa.int32()),
+    ("words", pa.int32()),
+])
+
+
+def classify(speaker):
+    if COMMISSIONER.search(speaker):
+        return "commissioner"
+    if APPLICANT.search(speaker):
+        return "applicant"
+    return "other"
+
+
+def parse_transcript(path):
+    # Plain or --zstd output; either way the hearing is named by its .txt.
+    with zstd_text.open_text(path) as f:
+        return parse_lines(zstd_text.text_name(os.path.basename(path)), f)
+
+
+_corpus = None
+
+
+def _open_corpus(path):
+    global _corpus
+    _corpus = Corpus(path)
+
+
+def parse_packed(filename):
+    # Worker side of --corpus: each process maps the corpus once.
+    # StringIO with universal newlines splits exactly like reading the file;
+    # str.splitlines would also break on the form feeds that mark pages.
+    return parse_lines(filename, io.StringIO(_corpus.text(filename), newline=None))
+
+
+def parse_lines(filename, lines_in):
+    turns = []
+    speaker = None
+    chars = words = 0
+    pages = 0
+    lines = 0
+
+    def close():
+        if speaker is not None:
+            turns.append((len(turns), speaker, classify(speaker), chars, words))
+
+    for line in lines_in:
+        lines += 1
+        pages += line.count("\f")
+        m = SPEAKER.match(line)
+        if m:
+            close()
+            speaker = " ".join(m.group(1).split())
+            text = m.group(2)
+            chars, words = len(text.strip()), len(text.split())
+        elif speaker is not None:
+            chars += len(line.strip())
+            words += len(line.split())
+
+    close()
+
+    # pdfminer ends every page with a form feed.
+    summary = {"Filename": filename, "turns": len(turns), "lines": lines, "pages": max(pages, 1)}
+    for role in ROLES:
+        summary[f"{role}_turns"] = 0
+        summary[f"{role}_chars"] = 0
+        summary[f"{role}_words"] = 0
+    for _, _, role, c, w in turns:
+        summary[f"{role}_turns"] += 1
+        summary[f"{role}_chars"] += c
+        summary[f"{role}_words"] += w
+    total = summary["commissioner_words"] + summary["applicant_words"]
+    summary["commissioner_share"] = summary["commissioner_words"] / total if total else None
+    return filename, turns, summary
+
+
+def turn_batch(results):
+    cols = {name: [] for name in TURN_SCHEMA.names}
+    for filename, turns, _ in results:
+        for turn, speaker, role, chars, words in turns:
+            cols["Filename"].append(filename)
+            cols["turn"].append(turn)
+            cols["speaker"].append(speaker)
+            cols["role"].append(role)
+            cols["chars"].append(chars)
+            cols["words"].append(words)
+    return pa.record_batch(
+        [pa.array(cols[n]).cast(TURN_SCHEMA.field(n).type) if n == "role" else
+         pa.array(cols[n], type=TURN_SCHEMA.field(n).type) for n in TURN_SCHEMA.names],
+        schema=TURN_SCHEMA,
+    )
+
+
+def parse_corpus(txt_dir, turns_out, hearings_out, workers=None, batch_files=256, corpus=None):
+    # With a packed corpus (corpus.py) the workers read slices of one
+    # mapped file instead of opening every transcript.
+    if corpus:
+        with Corpus(corpus) as packed:
+            paths = list(packed.names)
+        parse, pool_args = parse_packed, {"initializer": _open_corpus, "initargs": (corpus,)}
+    else:
+        paths = sorted(e.path for e in os.scandir(txt_dir)
+                       if e.name.endswith(zstd_text.TEXT_SUFFIXES) and e.is_file())
+        parse, pool_args = parse_transcript, {}
+    summaries = []
+    batch = []
+    with ProcessPoolExecutor(max_workers=workers, **pool_args) as pool, \
+            pq.ParquetWriter(turns_out, TURN_SCHEMA, compression="zstd") as writer:
+        # Turn rows are flushed every batch_files transcripts, so the parent
+        # only ever holds one batch of turns.
+        for result in pool.map(parse, paths, chunksize=16):
+            batch.append(result)
+            summaries.append(result[2])
+            if len(batch) >= batch_files:
+                writer.write_batch(turn_batch(batch))
+                batch = []
+        if batch:
+            writer.write_batch(turn_batch(batch))
+
+    pq.write_table(pa.Table.from_pylist(summaries), hearings_out, compression="zstd")
+    return len(paths)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parse transcripts into speaker turns")
+    parser.add_argument("--txt", default="txt")
+    parser.add_argument("--turns", default="turns.parquet")
+    parser.add_argument("--hearings", default="hearings.parquet")
+    parser.add_argument("--workers", type=int, default=0, help="0 uses every CPU")
+    parser.add_argument("--corpus", default=None,
+                        help="read transcripts from a packed corpus file instead of --txt")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    n = parse_corpus(args.txt, args.turns, args.hearings, args.workers or None,
+                     corpus=args.corpus)
+    elapsed = time.perf_counter() - t0
+    print(f"{n} transcripts parsed in {elapsed:.2f}s ({n / elapsed:.1f} files/sec)")
+
+
+if __name__ == "__main__":
+    main()
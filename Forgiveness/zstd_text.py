@@ -0,0 +1,167 @@
+import io
+import os
+
+import zstandard
+
+# Compressed storage for extracted transcripts. The transcripts repeat the
+# same headers, commissioner names and decision language, so a zstd
+# dictionary trained on a sample of them lets each file compress well on
+# its own while staying individually readable.
+#
+#   txt/<name>.txt.zst       one zstd frame per transcript
+#   txt/.transcripts.zdict   the dictionary every frame was written with
+#
+# read_text() and open_text() take either a .txt or a .txt.zst path, so
+# readers don't need to know which mode pdf_to_txt.py ran in; readers that
+# list txt/ use TEXT_SUFFIXES and text_name() to pick up both forms under
+# the plain .txt name.
+
+SUFFIX = ".zst"
+TEXT_SUFFIXES = (".txt", ".txt" + SUFFIX)
+DICT_NAME = ".transcripts.zdict"
+DICT_SIZE = 112 * 1024
+LEVEL = 9
+TRAIN_SAMPLES = 256
+
+
+def dict_path(directory):
+    return os.path.join(directory, DICT_NAME)
+
+
+def train(samples, size=DICT_SIZE):
+    # zstd needs the dictionary to be well under the sample total; with
+    # only a handful of transcripts it simply comes out smaller.
+    size = min(size, max(1024, sum(len(s) for s in samples) // 10))
+    try:
+        return zstandard.train_dictionary(size, samples)
+    except zstandard.ZstdError:
+        # Too few samples to train on: fall back to their raw bytes, which
+        # zstd can still use as a plain content dictionary.
+        return zstandard.ZstdCompressionDict(b"".join(samples)[-size:])
+
+
+def load_dict(directory):
+    with open(dict_path(directory), "rb") as f:
+        return zstandard.ZstdCompressionDict(f.read())
+
+
+def save_dict(zdict, directory):
+    tmp = dict_path(directory) + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(zdict.as_bytes())
+    os.replace(tmp, dict_path(directory))
+
+
+def text_name(filename):
+    # "<name>.txt" for either form of an extracted transcript, else None.
+    if filename.endswith(TEXT_SUFFIXES):
+        return filename.removesuffix(SUFFIX)
+    return None
+
+
+def text_path(directory, name):
+    # The file behind a .txt name: the plain file if there is one,
+    # otherwise its compressed form.
+    path = os.path.join(directory, name)
+    if os.path.exists(path) or not os.path.exists(path + SUFFIX):
+        return path
+    return path + SUFFIX
+
+
+def text_size(path):
+    # Size of the text itself; for .zst files it comes from the frame
+    # header, which Compressor always fills in.
+    path = str(path)
+    if not path.endswith(SUFFIX):
+        return os.path.getsize(path)
+    with open(path, "rb") as f:
+        header = f.read(18)
+    content_size = zstandard.frame_content_size(header) if header else 0
+    if content_size < 0:
+        return len(read_bytes(path))
+    return content_size
+
+
+_dicts = {}
+
+
+def _dict_for(path):
+    directory = os.path.dirname(os.path.abspath(path))
+    if directory not in _dicts:
+        _dicts[directory] = load_dict(directory)
+    return _dicts[directory]
+
+
+def read_bytes(path):
+    path = str(path)
+    with open(path, "rb") as f:
+        data = f.read()
+    if not path.endswith(SUFFIX):
+        return data
+    return zstandard.ZstdDecompressor(dict_data=_dict_for(path)).decompress(data)
+
+
+def read_text(path):
+    return read_bytes(path).decode("utf-8", "replace")
+
+
+def open_text(path):
+    # Streaming counterpart of read_text, for reading line by line.
+    path = str(path)
+    if not path.endswith(SUFFIX):
+        return open(path, encoding="utf-8", errors="replace")
+    dctx = zstandard.ZstdDecompressor(dict_data=_dict_for(path))
+    reader = dctx.stream_reader(open(path, "rb"), closefd=True)
+    return io.TextIOWrapper(reader, encoding="utf-8", errors="replace")
+
+
+class Compressor:
+    # Used by pdf_to_txt.py --zstd. Until the output directory has a
+    # dictionary, extracted files are held back as plain temp files; once
+    # TRAIN_SAMPLES have arrived (or at flush) the dictionary is trained on
+    # them and everything is written compressed from then on.
+    def __init__(self, directory, level=LEVEL, samples=TRAIN_SAMPLES):
+        self.directory = str(directory)
+        self.level = level
+        self.samples = samples
+        self.pending = []
+        self.cctx = None
+        if os.path.exists(dict_path(self.directory)):
+            self._start(load_dict(self.directory))
+
+    def _start(self, zdict):
+        self.cctx = zstandard.ZstdCompressor(level=self.level, dict_data=zdict)
+
+    def put(self, tmp_file, output_file):
+        # Moves tmp_file (plain text) to output_file (.txt.zst).
+        if self.cctx is None:
+            self.pending.append((str(tmp_file), str(output_file)))
+            if len(self.pending) >= self.samples:
+                self.flush()
+            return
+        self._write(str(tmp_file), str(output_file))
+
+    def flush(self):
+        if not self.pending:
+            return
+        if self.cctx is None:
+            samples = []
+            for tmp_file, _ in self.pending:
+                with open(tmp_file, "rb") as f:
+                    samples.append(f.read())
+            zdict = train(samples)
+            save_dict(zdict, self.directory)
+            _dicts.pop(os.path.abspath(self.directory), None)
+            self._start(zdict)
+        for tmp_file, output_file in self.pending:
+            self._write(tmp_file, output_file)
+        self.pending = []
+
+    def _write(self, tmp_file, output_file):
+        with open(tmp_file, "rb") as f:
+            data = self.cctx.compress(f.read())
+        part = output_file + ".part"
+        with open(part, "wb") as f:
+            f.write(data)
+        os.replace(part, output_file)
+        os.unlink(tmp_file)